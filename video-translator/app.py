@@ -9,6 +9,7 @@ import tempfile
 from pathlib import Path
 import json
 import time
+import logging
 
 # Import custom modules
 from modules.audio_extractor import AudioExtractor
@@ -17,6 +18,9 @@ from modules.translator import Translator
 from modules.tts_generator import TTSGenerator
 from modules.video_composer import VideoComposer
 
+# Route module progress logs to the console
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
 # Page configuration
 st.set_page_config(
     page_title="Video Language Translator",
@@ -502,6 +506,7 @@ def edit_translation_interface(translation_data, work_dir, target_lang):
     
     # Display editing interface
     edited_sentences = []
+    field_name = "text_en" if target_lang == "en" else "text_translated"
     
     with st.form("edit_translation_form"):
         st.subheader("Edit Translation Content")
@@ -525,11 +530,6 @@ def edit_translation_interface(translation_data, work_dir, target_lang):
                 
                 with col2:
                     # Edit translation
-                    if target_lang == "en":
-                        field_name = "text_en"
-                    else:
-                        field_name = "text_translated"
-                    
                     new_translation = st.text_area(
                         f"Translation {i+1}",
                         value=sentence.get(field_name, ""),
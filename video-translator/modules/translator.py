@@ -5,16 +5,172 @@ Uses the Boson AI API to translate text into a target language
 """
 
 import os
+import io
 import json
 import time
 import re
-from openai import OpenAI
+import random
+import sqlite3
+import hashlib
+import asyncio
+import logging
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+log = logging.getLogger(__name__)
+
+# Leading line numbering emitted by the model (supports 1., 1), 1、 etc.)
+_NUM_PREFIX_RE = re.compile(r"^(\d+)[\.\)、]\s*")
+
+# One `"12": "..."` entry of a pretty-printed JSON translation map (progress display only)
+_JSON_ENTRY_RE = re.compile(r'^\s*"(\d+)"\s*:\s*"(.*?)",?\s*$')
+
+# Readable names for supported target language codes
+_LANGUAGE_NAMES = {
+    "en": "English",
+    "zh": "Chinese",
+    "ja": "Japanese",
+    "ko": "Korean",
+    "fr": "French",
+    "de": "German",
+    "es": "Spanish",
+    "ru": "Russian",
+    "ar": "Arabic",
+    "hi": "Hindi"
+}
+
+# Deletion table for _clean_text: CJK ideographs (U+4E00–U+9FFF) and Chinese punctuation
+_CJK_DELETE_TABLE = dict.fromkeys(
+    list(range(0x4e00, 0xa000)) + [ord(c) for c in '，。！？、；："《》【】（）'], None
+)
+
+# Transient API errors worth retrying (rate limits, timeouts, 5xx)
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def _load_json(path):
+    """Read a JSON file (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _json_loads(text):
+    """Parse a JSON string (orjson when available)"""
+    return orjson.loads(text) if ORJSON_AVAILABLE else json.loads(text)
+
+
+def _dump_json(data, path):
+    """Write UTF-8, 2-space indented JSON (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+class _RateLimiter:
+    """Async token bucket limiting requests and tokens per minute"""
+    
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+    
+    async def acquire(self, tokens=0):
+        """Wait until one request (and the estimated tokens) can be spent"""
+        if not self.rpm and not self.tpm:
+            return
+        async with self._lock:
+            while True:
+                self._refill()
+                if (not self.rpm or self._requests >= 1) and (not self.tpm or self._tokens >= min(tokens, self.tpm)):
+                    if self.rpm:
+                        self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= min(tokens, self.tpm)
+                    return
+                await asyncio.sleep(0.1)
+
+
+class _TranslationCache:
+    """Persistent sqlite cache of sentence translations keyed by (model, target language, sentence)"""
+    
+    def __init__(self, cache_dir=".translator_cache"):
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "translations.sqlite3"))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, value TEXT)")
+    
+    @staticmethod
+    def key(model, target_lang, text):
+        return hashlib.blake2b(f"{model}|{target_lang}|{text}".encode("utf-8"), digest_size=16).hexdigest()
+    
+    def get_many(self, keys):
+        """Return {key: translation} for the keys already cached"""
+        found = {}
+        keys = list(keys)
+        # Stay under SQLite's bound-parameter limit
+        for k in range(0, len(keys), 500):
+            batch = keys[k:k + 500]
+            rows = self._conn.execute(
+                f"SELECT key, value FROM translations WHERE key IN ({','.join('?' * len(batch))})", batch
+            )
+            found.update(rows)
+        return found
+    
+    def set_many(self, items):
+        """Store (key, translation) pairs"""
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?)", items)
+    
+    def close(self):
+        self._conn.close()
 
 
 class Translator:
     """Text Translator using Boson AI (Enhanced Version)"""
     
-    def __init__(self, api_key=None, api_base=None, model=None):
+    # Sentences per translation request: fewer requests than per-sentence,
+    # shorter decodes (and no max_tokens truncation) than one monolithic call
+    BATCH_SIZE = 15
+    
+    def __init__(self, api_key=None, api_base=None, model=None, verbose=True,
+                 max_concurrency=8, max_requests_per_minute=None, max_tokens_per_minute=None,
+                 chunk_size=None, max_attempts=6, cache_dir=".translator_cache"):
         """
         Initialize the translator
         
@@ -22,31 +178,98 @@ class Translator:
             api_key: API key
             api_base: Base URL for the API
             model: Model name
+            verbose: Whether to log dividers and per-sentence comparisons
+            max_concurrency: Maximum number of in-flight translation requests
+            max_requests_per_minute: Optional request throttle (None = unlimited)
+            max_tokens_per_minute: Optional token throttle (None = unlimited)
+            chunk_size: Number of sentences sent per translation request (default BATCH_SIZE)
+            max_attempts: Attempts per API call before giving up on transient errors
+            cache_dir: Directory of the on-disk translation cache (None disables caching)
         """
         self.api_key = api_key or os.getenv("BOSON_API_KEY", "bai-4RckqUuoLpgxtUFcgT4fMwHQddd-dR0_AZOxII6UOZhPmR1s")
         self.api_base = api_base or "https://hackathon.boson.ai/v1"
         self.model = model or "Qwen3-32B-non-thinking-Hackathon"
         self.client = None
+        self.verbose = verbose
+        self.max_concurrency = max_concurrency
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self.chunk_size = chunk_size or self.BATCH_SIZE
+        self.max_attempts = max_attempts
+        self.cache_dir = cache_dir
+    
+    def _divider(self, line="=" * 80):
+        """Log a visual divider (skipped when not verbose)"""
+        if not self.verbose:
+            return
+        log.info(line)
     
     def _init_client(self):
         """Initialize the API client"""
         if self.client is not None:
             return
         
-        print(f"🔄 Initializing Boson AI client...")
+        log.info(f"🔄 Initializing Boson AI client...")
         
         try:
-            self.client = OpenAI(api_key=self.api_key, base_url=self.api_base)
-            print("✅ Client initialized successfully")
+            # One pooled keep-alive client shared by every request of the run
+            # (HTTP/2 multiplexes the concurrent chunks when h2 is installed)
+            http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                timeout=httpx.Timeout(60.0, connect=10.0)
+            )
+            self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.api_base, http_client=http_client)
+            log.info("✅ Client initialized successfully")
         
         except Exception as e:
-            print(f"❌ Failed to initialize client: {e}")
+            log.error(f"❌ Failed to initialize client: {e}")
             raise
     
     def translate(self, input_json_path, output_json_path, target_lang="en"):
         """
         Translate all sentences in a JSON file
         
+        Args:
+            input_json_path: Path to the input JSON file
+            output_json_path: Path to save the output JSON file
+            target_lang: Target language code
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return asyncio.run(self.translate_async(input_json_path, output_json_path, target_lang))
+    
+    async def translate_many(self, jobs, max_concurrency=4):
+        """
+        Translate several JSON files concurrently over one shared client
+        
+        Args:
+            jobs: Iterable of (input_json_path, output_json_path, target_lang) tuples
+            max_concurrency: Maximum number of files translated at once
+        
+        Returns:
+            list: One success flag per job, in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        self._init_client()
+        
+        async def bounded(job):
+            async with semaphore:
+                return await self.translate_async(*job)
+        
+        try:
+            # asyncio.gather rather than TaskGroup keeps Python 3.9 support;
+            # translate_async never raises, so one bad file cannot cancel the rest
+            return await asyncio.gather(*[bounded(job) for job in jobs])
+        finally:
+            await self.client.close()
+            self.client = None
+    
+    async def translate_async(self, input_json_path, output_json_path, target_lang="en"):
+        """
+        Translate all sentences in a JSON file (coroutine version of translate)
+        
         Args:
             input_json_path: Path to the input JSON file
             output_json_path: Path to save the output JSON file
@@ -56,119 +279,183 @@ class Translator:
             bool: True if successful, False otherwise
         """
         if not os.path.exists(input_json_path):
-            print(f"❌ Input file not found: {input_json_path}")
+            log.error(f"❌ Input file not found: {input_json_path}")
             return False
         
         try:
-            # Initialize client
-            self._init_client()
-            
             # Load input file
-            with open(input_json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = _load_json(input_json_path)
             
             if not isinstance(data, list) or len(data) == 0:
-                print("❌ Invalid JSON format")
+                log.error("❌ Invalid JSON format")
                 return False
             
             result = data[0]
             sentences = result.get("sentence_info", [])
             total = len(sentences)
             
-            print("=" * 80)
-            print(f"🎬 Step 2: Text Translation")
-            print("=" * 80)
-            print(f"✅ Loaded {total} sentences")
-            
-            # Source and target languages
-            source_lang = "Chinese"  # Assume source is Chinese
-            target_lang_name = self._get_language_name(target_lang)
-            print(f"🌍 Translation direction: {source_lang} → {target_lang_name}")
-            
-            # ===== Step 1: Analyze content style =====
-            print("\n" + "=" * 80)
-            print("🔍 Step 1/3: Analyzing content style")
-            print("=" * 80)
-            style_info = self._analyze_content_style(sentences)
+            self._divider()
+            log.info(f"🎬 Step 2: Text Translation")
+            self._divider()
+            log.info(f"✅ Loaded {total} sentences")
             
-            # ===== Step 2: Full translation =====
-            print("\n" + "=" * 80)
-            print(f"📝 Step 2/3: Translating ({source_lang} → {target_lang_name})")
-            print("=" * 80)
-            translations = self._translate_full_script(sentences, style_info, source_lang, target_lang_name)
+            translations = await self._do_translate(sentences, target_lang)
             
-            if not translations:
-                print("❌ Translation failed")
+            if not any(translations):
+                log.error("❌ Translation failed")
                 return False
             
-            # ===== Step 2.5: Global refinement (optional, disabled by default) =====
-            # Uncomment the section below to enable natural translation polishing
-            # print("\n" + "=" * 80)
-            # print("🎭 Step 2.5/3: Global refinement (optional)")
-            # print("=" * 80)
-            # translations = self._refine_translation_globally(sentences, translations, style_info, target_lang_name)
-            
-            # ===== Step 3: Output comparison =====
-            print("\n" + "=" * 80)
-            print("✏️ Step 3/3: Translation Comparison")
-            print("=" * 80)
-            
-            print("\nTranslation Comparison:")
-            print("-" * 80)
-            for i in range(min(len(sentences), len(translations))):
-                orig = sentences[i].get("text", "")
-                trans = translations[i]
-                orig_words = len(orig)
-                trans_words = len(trans.split())
-                
-                print(f"\n[{i+1}/{total}] Original: {orig}")
-                print(f"     Translation: {trans}")
-                print(f"     Word count: CN {orig_words} chars → {target_lang_name} {trans_words} words")
+            # Determine field name by target language
+            field_name = "text_en" if target_lang == "en" else "text_translated"
             
-            if len(sentences) > 5:
-                print(f"\n... (showing first 5 out of {total} sentences)")
-            print("-" * 80)
-            
-            # Build output
-            translated_sentences = []
-            for i, s in enumerate(sentences):
-                trans_text = translations[i] if i < len(translations) else ""
-                
-                # Determine field name by target language
-                if target_lang == "en":
-                    field_name = "text_en"
-                else:
-                    field_name = "text_translated"
-                
-                translated_sentences.append({
-                    "text": s.get("text", ""),
-                    field_name: trans_text,
-                    "start": s.get("start", 0),
-                    "end": s.get("end", 0)
-                })
+            # Build output in one pass (loop invariants hoisted out of the comprehension)
+            n_trans = len(translations)
+            translated_sentences = [
+                {"text": s.get("text", ""), field_name: translations[i] if i < n_trans else "",
+                 "start": s.get("start", 0), "end": s.get("end", 0)}
+                for i, s in enumerate(sentences)
+            ]
             
             # Update and save data
             data[0]["sentence_info"] = translated_sentences
             
-            with open(output_json_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            _dump_json(data, output_json_path)
             
-            print(f"\n💾 Translation complete! Saved to: {output_json_path}")
-            print("=" * 80)
+            log.info(f"\n💾 Translation complete! Saved to: {output_json_path}")
+            self._divider()
             return True
         
         except Exception as e:
-            print(f"❌ Translation failed: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"❌ Translation failed: {e}")
             return False
     
-    def _analyze_content_style(self, sentences):
-        """Analyze the overall tone and style of the video"""
-        # Sample first 5 and last 2 lines
-        sample_texts = [s.get("text", "").strip() for s in sentences[:5]]
-        sample_texts += [s.get("text", "").strip() for s in sentences[-2:]]
-        sample = "\n".join([f"{i+1}. {t}" for i, t in enumerate(sample_texts) if t])
+    async def _do_translate(self, sentences, target_lang):
+        """
+        Translate sentence records without reading or writing the JSON files
+        (the sqlite translation cache under cache_dir is still consulted and updated)
+        
+        Args:
+            sentences: List of sentence dicts with a "text" field
+            target_lang: Target language code
+        
+        Returns:
+            list: One translation per sentence ("" where translation failed)
+        """
+        # Source and target languages
+        source_lang = "Chinese"  # Assume source is Chinese
+        target_lang_name = self._get_language_name(target_lang)
+        log.info(f"🌍 Translation direction: {source_lang} → {target_lang_name}")
+        
+        translations = await self._run_translation(sentences, source_lang, target_lang_name)
+        
+        # ===== Step 3: Output comparison =====
+        # Skip the formatting work entirely when nobody will see it
+        if any(translations) and self.verbose and log.isEnabledFor(logging.INFO):
+            self._log_comparison(sentences, translations, target_lang_name)
+        
+        return translations
+    
+    def _log_comparison(self, sentences, translations, target_lang_name):
+        """Log the first few original/translation pairs"""
+        self._divider("\n" + "=" * 80)
+        log.info("✏️ Step 3/3: Translation Comparison")
+        self._divider()
+        
+        log.info("\nTranslation Comparison:")
+        self._divider("-" * 80)
+        # Buffer the rows and emit them as a single log record
+        buf = io.StringIO()
+        for i in range(min(5, len(sentences), len(translations))):
+            orig = sentences[i].get("text", "")
+            trans = translations[i]
+            orig_words = len(orig)
+            trans_words = len(trans.split())
+            
+            buf.write(f"\n[{i+1}/{len(sentences)}] Original: {orig}\n")
+            buf.write(f"     Translation: {trans}\n")
+            buf.write(f"     Word count: CN {orig_words} chars → {target_lang_name} {trans_words} words\n")
+        
+        if len(sentences) > 5:
+            buf.write(f"\n... (showing first 5 out of {len(sentences)} sentences)\n")
+        log.info(buf.getvalue().rstrip("\n"))
+        self._divider("-" * 80)
+    
+    async def _run_translation(self, sentences, source_lang, target_lang_name):
+        """Run analysis, translation and optional refinement on one event loop"""
+        # Reuse a client opened by translate_many; otherwise own it for this run
+        owns_client = self.client is None
+        self._init_client()
+        try:
+            # ===== Steps 1-2: Analyze content style + translate =====
+            # The analysis rides along with the first chunk's request
+            self._divider("\n" + "=" * 80)
+            log.info(f"🔍📝 Steps 1-2/3: Analyzing style and translating ({source_lang} → {target_lang_name})")
+            self._divider()
+            style_info, translations = await self._translate_full_script(sentences, source_lang, target_lang_name)
+            
+            # ===== Step 2.5: Global refinement (optional, disabled by default) =====
+            # Set TRANSLATOR_GLOBAL_REFINE=1 to enable natural translation polishing
+            if any(translations) and os.getenv("TRANSLATOR_GLOBAL_REFINE"):
+                from .translator_experimental import refine_translation_globally
+                self._divider("\n" + "=" * 80)
+                log.info("🎭 Step 2.5/3: Global refinement (optional)")
+                self._divider()
+                translations = await refine_translation_globally(self, sentences, translations, style_info, target_lang_name)
+            
+            return translations
+        finally:
+            # The async client is bound to this event loop
+            if owns_client:
+                await self.client.close()
+                self.client = None
+    
+    async def _call_llm(self, on_line=None, base_delay=1.0, max_delay=60.0, jitter=1.0, **kwargs):
+        """
+        Stream a chat completion, retrying transient errors with exponential backoff
+        
+        Args:
+            on_line: Optional callback invoked with each complete output line as it arrives
+        
+        Returns:
+            str: The full response text (non-retryable errors and the final failure propagate)
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                stream = await self.client.chat.completions.create(stream=True, **kwargs)
+                parts = []
+                pending = ""
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    if on_line is not None:
+                        pending += delta
+                        *complete, pending = pending.split("\n")
+                        for line in complete:
+                            on_line(line)
+                if on_line is not None and pending:
+                    on_line(pending)
+                return "".join(parts)
+            except _RETRYABLE_ERRORS as e:
+                if attempt == self.max_attempts - 1:
+                    raise
+                delay = min(base_delay * 2 ** attempt, max_delay) + random.random() * jitter
+                kind = "Rate limited" if isinstance(e, openai.RateLimitError) else "Transient API error"
+                log.warning(f"⚠️ {kind} ({e.__class__.__name__}), retrying in {delay:.1f}s "
+                            f"[{attempt + 1}/{self.max_attempts}]")
+                await asyncio.sleep(delay)
+    
+    def _style_sample(self, texts):
+        """Sample first 5 and last 2 (already stripped) lines for style analysis"""
+        sample_texts = texts[:5] + texts[-2:]
+        return "\n".join(f"{i+1}. {t}" for i, t in enumerate(sample_texts) if t)
+    
+    async def _analyze_content_style(self, texts):
+        """Analyze the overall tone and style of the video (fallback when the fused request fails)"""
+        sample = self._style_sample(texts)
         
         prompt = f"""Analyze this video transcript sample and identify:
 
@@ -183,7 +470,7 @@ Provide a brief analysis (2-3 sentences):
 Keep it concise:"""
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self._call_llm(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a content analyst."},
@@ -192,180 +479,249 @@ Keep it concise:"""
                 temperature=0.3,
                 max_tokens=200
             )
-            analysis = response.choices[0].message.content.strip()
-            print(f"\n📊 Content Analysis:\n{analysis}\n")
+            analysis = response.strip()
+            log.info(f"\n📊 Content Analysis:\n{analysis}\n")
             return {"analysis": analysis}
         except Exception as e:
-            print(f"⚠️ Analysis failed: {e}")
+            log.warning(f"⚠️ Analysis failed: {e}")
             return {"analysis": "General video content."}
     
-    def _translate_full_script(self, sentences, style_info, source_lang, target_lang):
-        """Translate the entire transcript while keeping timestamp structure"""
-        # Combine full script
-        full_script = []
-        for i, s in enumerate(sentences):
-            text = s.get("text", "").strip()
-            if text:
-                full_script.append(f"{i+1}. {text}")
-        script_text = "\n".join(full_script)
+    async def _translate_full_script(self, sentences, source_lang, target_lang):
+        """
+        Translate the transcript in concurrent chunks while keeping timestamp structure
+        
+        Returns:
+            tuple: (style_info, per-sentence translations)
+        """
+        # Strip once; reused for dedup and the style sample
+        texts = [s.get("text", "").strip() for s in sentences]
+        
+        # Index repeated lines so each unique sentence is translated only once
+        unique = {}
+        order = []
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            unique.setdefault(text, []).append(i)
+            if len(unique[text]) == 1:
+                order.append(text)
+        
+        if len(order) < len(sentences):
+            log.info(f"♻️ {len(order)} unique sentences out of {len(sentences)}")
+        
+        # Previously translated sentences skip the API entirely
+        lines = [""] * len(order)
+        cache = _TranslationCache(self.cache_dir) if self.cache_dir else None
+        if cache:
+            keys = [_TranslationCache.key(self.model, target_lang, text) for text in order]
+            cached = cache.get_many(keys)
+            for k, key in enumerate(keys):
+                lines[k] = cached.get(key, "")
+            if cached:
+                log.info(f"💾 {len(cached)} sentences served from cache")
+        
+        pending = [k for k in range(len(order)) if not lines[k]]
+        pending_texts = [order[k] for k in pending]
+        chunks = [(k, pending_texts[k:k + self.chunk_size]) for k in range(0, len(pending), self.chunk_size)]
+        if not chunks:
+            if cache:
+                cache.close()
+            return {"analysis": "General video content."}, self._fan_out(sentences, order, unique, lines)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limiter = _RateLimiter(self.max_requests_per_minute, self.max_tokens_per_minute)
+        
+        # One round-trip for style analysis + first chunk
+        log.info(f"\n🤖 Translating {len(pending)} sentences in {len(chunks)} requests...")
+        try:
+            style_info, first_result = await self._analyze_and_translate_first_chunk(
+                texts, chunks[0][1], source_lang, target_lang, limiter
+            )
+            results = [first_result]
+            remaining = chunks[1:]
+        except Exception as e:
+            log.warning(f"⚠️ Fused analysis request failed ({e}), falling back to separate requests")
+            style_info = await self._analyze_content_style(texts)
+            results = []
+            remaining = chunks
         
         style_context = style_info.get("analysis", "")
         
+        async def bounded(offset, chunk):
+            async with semaphore:
+                return await self._translate_chunk(offset, chunk, style_context, source_lang, target_lang, limiter)
+        
+        results += await asyncio.gather(*[bounded(offset, chunk) for offset, chunk in remaining])
+        
+        # Each chunk reports translations by absolute index into `pending`
+        for indexed in results:
+            for idx, line in indexed.items():
+                lines[pending[idx]] = line
+        
+        if cache:
+            cache.set_many(
+                (_TranslationCache.key(self.model, target_lang, order[k]), lines[k])
+                for k in pending if lines[k]
+            )
+            cache.close()
+        
+        log.info(f"✅ Successfully translated {sum(1 for line in lines if line)} sentences\n")
+        
+        out = self._fan_out(sentences, order, unique, lines)
+        
+        # Preview translation
+        log.info("Translation Preview:")
+        self._divider("-" * 80)
+        for i in range(min(5, len(lines))):
+            log.info(f"{i+1}. {lines[i]}")
+        if len(lines) > 5:
+            log.info(f"... ({len(lines)-5} more)")
+        self._divider("-" * 80)
+        
+        return style_info, out
+    
+    def _fan_out(self, sentences, order, unique, lines):
+        """Fan unique translations back out to every occurrence"""
+        out = [""] * len(sentences)
+        for k, text in enumerate(order):
+            for j in unique[text]:
+                out[j] = lines[k]
+        return out
+    
+    async def _analyze_and_translate_first_chunk(self, texts, chunk, source_lang, target_lang, limiter):
+        """
+        Fused request: analyze content style and translate the first chunk
+        
+        Returns:
+            tuple: (style_info, {absolute index: translation})
+        """
+        sample = self._style_sample(texts)
+        script_text = "\n".join(f"{i+1}. {text}" for i, text in enumerate(chunk))
+        
         prompt = f"""You are translating a video transcript from {source_lang} to {target_lang}.
 
-CONTENT ANALYSIS:
-{style_context}
+First, analyze this transcript sample:
+{sample}
 
-FULL TRANSCRIPT:
+Write a brief analysis (2-3 sentences) of the content type, the tone and style,
+and any special traits (wordplay, technical terms, etc.).
+
+Then translate these numbered sentences:
 {script_text}
 
 TRANSLATION REQUIREMENTS:
 1. Translate naturally and fluently as if originally written in {target_lang}.
 2. Keep the same tone, humor, and emotion.
-3. Output numbered sentences exactly as in the input (1., 2., 3., ...).
-4. Only return the translated lines — do not repeat the {source_lang} text.
+3. Only return {target_lang} translations — do not repeat the {source_lang} text.
 
-Begin translation:"""
+Return a JSON object of the form:
+{{"analysis": "...", "translations": {{"1": "...", "2": "..."}}}}"""
         
-        try:
-            print("\n🤖 Translating...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a professional translator for video subtitles."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-                max_tokens=2000
-            )
-            
-            translation = response.choices[0].message.content.strip()
-            lines = []
-            for line in translation.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                # Remove numbering (supports 1., 1), 1、 etc.)
-                line = re.sub(r"^\d+[\.\)、]\s*", "", line)
-                line = self._clean_text(line)
-                if line and len(line) > 1:
-                    lines.append(line)
-            
-            print(f"✅ Successfully translated {len(lines)} sentences\n")
-            
-            # Preview translation
-            print("Translation Preview:")
-            print("-" * 80)
-            for i in range(min(5, len(lines))):
-                print(f"{i+1}. {lines[i]}")
-            if len(lines) > 5:
-                print(f"... ({len(lines)-5} more)")
-            print("-" * 80)
-            
-            return lines
-        except Exception as e:
-            print(f"❌ Translation failed: {e}")
-            return []
-    
-    def _clean_text(self, text):
-        """Clean translation text"""
-        # Remove Chinese characters
-        text = re.sub(r'[\u4e00-\u9fff]+', '', text)
-        # Remove Chinese punctuation
-        text = re.sub(r'[，。！？、；：""''《》【】（）]', '', text)
-        # Normalize spaces
-        text = ' '.join(text.split())
-        return text.strip()
+        max_tokens = 2200
+        await limiter.acquire(len(prompt) + max_tokens)
+        response = await self._call_llm(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You are a content analyst and professional translator for video subtitles."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.5,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        )
+        
+        obj = _json_loads(response)
+        analysis = str(obj.get("analysis", "")).strip() or "General video content."
+        log.info(f"\n📊 Content Analysis:\n{analysis}\n")
+        
+        return {"analysis": analysis}, self._map_json_translations(obj.get("translations", {}), 0, len(chunk))
     
-    def _refine_translation_globally(self, sentences, translations, style_info, target_lang):
-        """Globally polish translation (preserving humor and rhythm) — optional"""
-        print("\n🎭 Performing global refinement (keeping humor and rhythm)...")
+    def _map_json_translations(self, translations, offset, count):
+        """Map a JSON {number: translation} object to absolute indices in [offset, offset + count)"""
+        # Tolerate the map being wrapped as {"translations": {...}}
+        if isinstance(translations, dict) and isinstance(translations.get("translations"), (dict, list)):
+            translations = translations["translations"]
+        if isinstance(translations, list):
+            translations = {str(offset + i + 1): t for i, t in enumerate(translations)}
         
-        style_context = style_info.get("analysis", "")
+        result = {}
+        for key, value in translations.items():
+            try:
+                idx = int(key) - 1
+            except (TypeError, ValueError):
+                continue
+            line = str(value).strip() if value is not None else ""
+            if line and offset <= idx < offset + count:
+                result[idx] = line
+        return result
+    
+    async def _translate_chunk(self, offset, chunk, style_context, source_lang, target_lang, limiter):
+        """Translate one chunk of sentences; returns {absolute index: translation}"""
+        script_text = "\n".join(f"{offset+i+1}. {text}" for i, text in enumerate(chunk))
         
-        # Create bilingual comparison text
-        paired_lines = []
-        for i, s in enumerate(sentences):
-            orig = s.get("text", "").strip()
-            trans = translations[i] if i < len(translations) else ""
-            if orig and trans:
-                paired_lines.append(f"{i+1}. {orig}\n→ {trans}")
-        paired_text = "\n".join(paired_lines)
-        
-        prompt = f"""
-You are a bilingual humor script editor.
-Below is a bilingual translation of a video narration.
-
-Your task:
-1. Polish the {target_lang} translation as a whole so it reads naturally, witty, and rhythmic.
-2. Preserve all jokes, humor, and comedic timing.
-3. Keep the meaning faithful to the original.
-4. Keep numbering (1., 2., 3., ...). One line per number.
-5. Do NOT output the original text, only the improved and refined {target_lang}.
-
-CONTENT STYLE:
+        prompt = f"""You are translating a video transcript from {source_lang} to {target_lang}.
+
+CONTENT ANALYSIS:
 {style_context}
 
-TRANSLATION DRAFT:
-{paired_text}
+TRANSCRIPT EXCERPT:
+{script_text}
 
-Now rewrite the {target_lang} lines according to these rules.
-Output format:
-1. ...
-2. ...
-"""
+TRANSLATION REQUIREMENTS:
+1. Translate naturally and fluently as if originally written in {target_lang}.
+2. Keep the same tone, humor, and emotion.
+3. Only return {target_lang} translations — do not repeat the {source_lang} text.
+
+Return a JSON object mapping each input number (as a string key) to its translation,
+one entry per line:
+{{"{offset + 1}": "...", "{offset + 2}": "..."}}"""
+        
+        max_tokens = 2000
+        
+        def on_line(raw):
+            # Live progress only; the complete JSON object is parsed below
+            m = _JSON_ENTRY_RE.match(raw)
+            if m and self.verbose:
+                log.info(f"  [{m.group(1)}] {m.group(2)}")
         
         try:
-            print("🤖 LLM performing global refinement...")
-            response = self.client.chat.completions.create(
+            await limiter.acquire(len(prompt) + max_tokens)
+            response = await self._call_llm(
+                on_line=on_line,
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": f"You are a witty, natural-sounding {target_lang} script editor."},
+                    {"role": "system", "content": "You are a professional translator for video subtitles."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7,
-                max_tokens=2500
+                temperature=0.5,
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
             )
             
-            refined_text = response.choices[0].message.content.strip()
-            refined_lines = []
-            for line in refined_text.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                # Remove numbering
-                line = re.sub(r"^\d+[\.\)、]\s*", "", line)
-                line = self._clean_text(line)
-                if line:
-                    refined_lines.append(line)
-            
-            print(f"✅ Globally refined {len(refined_lines)} sentences")
-            print("Refinement Preview:")
-            print("-" * 80)
-            for i in range(min(5, len(refined_lines))):
-                print(f"{i+1}. {refined_lines[i]}")
-            if len(refined_lines) > 5:
-                print(f"... ({len(refined_lines)-5} more)")
-            print("-" * 80)
-            
-            return refined_lines
-        
+            return self._map_json_translations(_json_loads(response), offset, len(chunk))
         except Exception as e:
-            print(f"⚠️ Global refinement failed: {e}")
-            return translations
+            log.error(f"❌ Chunk translation failed: {e}")
+            return {}
+    
+    def _parse_numbered_lines(self, text, count, min_len=2):
+        """Map numbered model output to cleaned lines by index; unnumbered lines are ignored"""
+        lines = {}
+        for raw in text.split("\n"):
+            m = _NUM_PREFIX_RE.match(raw.strip())
+            if not m:
+                continue
+            idx = int(m.group(1)) - 1
+            line = self._clean_text(raw.strip()[m.end():])
+            if 0 <= idx < count and len(line) >= min_len:
+                lines[idx] = line
+        return lines
+    
+    def _clean_text(self, text):
+        """Clean translation text"""
+        # Remove Chinese characters and punctuation in one pass, then normalize spaces
+        return ' '.join(text.translate(_CJK_DELETE_TABLE).split())
     
-    def _get_language_name(self, lang_code):
+    @staticmethod
+    def _get_language_name(lang_code):
         """Get readable language name from code"""
-        language_names = {
-            "en": "English",
-            "zh": "Chinese",
-            "ja": "Japanese",
-            "ko": "Korean",
-            "fr": "French",
-            "de": "German",
-            "es": "Spanish",
-            "ru": "Russian",
-            "ar": "Arabic",
-            "hi": "Hindi"
-        }
-        return language_names.get(lang_code, "English")
\ No newline at end of file
+        return _LANGUAGE_NAMES.get(lang_code, "English")
\ No newline at end of file
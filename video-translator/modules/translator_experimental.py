@@ -0,0 +1,85 @@
+"""
+Experimental Translation Refinement
+Optional global polishing pass for Translator output.
+Only imported when TRANSLATOR_GLOBAL_REFINE is set.
+"""
+
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+async def refine_translation_globally(translator, sentences, translations, style_info, target_lang):
+    """Globally polish translation (preserving humor and rhythm) — optional"""
+    log.info("\n🎭 Performing global refinement (keeping humor and rhythm)...")
+    
+    style_context = style_info.get("analysis", "")
+    
+    # Draft lines only: the style analysis already carries the original's tone,
+    # so resending the source text would roughly double the prompt tokens
+    draft_text = "\n".join(
+        f"{i+1}. {trans}"
+        for i, (s, trans) in enumerate(zip(sentences, translations))
+        if trans and s.get("text", "").strip()
+    )
+    
+    prompt = f"""
+You are a humor script editor.
+Below is a {target_lang} draft translation of a video narration.
+
+Your task:
+1. Polish these {target_lang} lines as a whole, in the style described below, so they read naturally, witty, and rhythmic.
+2. Preserve all jokes, humor, and comedic timing.
+3. Keep the meaning of each line.
+4. Keep numbering (1., 2., 3., ...). One line per number.
+
+CONTENT STYLE:
+{style_context}
+
+TRANSLATION DRAFT:
+{draft_text}
+
+Now rewrite the {target_lang} lines according to these rules.
+Output format:
+1. ...
+2. ...
+"""
+    
+    try:
+        log.info("🤖 LLM performing global refinement...")
+        response = await translator._call_llm(
+            model=translator.model,
+            messages=[
+                {"role": "system", "content": f"You are a witty, natural-sounding {target_lang} script editor."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=2500
+        )
+        
+        refined_text = response.strip()
+        refined_by_index = translator._parse_numbered_lines(refined_text, len(translations), min_len=1)
+        
+        # Lines are matched by their number, so empty or untranslated sentences
+        # (never sent) keep their slot instead of shifting everything after them
+        refined_lines = list(translations)
+        for idx, line in refined_by_index.items():
+            if refined_lines[idx]:
+                refined_lines[idx] = line
+        
+        log.info(f"✅ Globally refined {len(refined_by_index)} sentences")
+        log.info("Refinement Preview:")
+        translator._divider("-" * 80)
+        preview = sorted(refined_by_index.items())
+        for idx, line in preview[:5]:
+            log.info(f"{idx+1}. {line}")
+        if len(preview) > 5:
+            log.info(f"... ({len(preview)-5} more)")
+        translator._divider("-" * 80)
+        
+        return refined_lines
+    
+    except Exception as e:
+        log.warning(f"⚠️ Global refinement failed: {e}")
+        return translations
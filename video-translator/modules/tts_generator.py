@@ -10,15 +10,223 @@ Features:
 import os
 import json
 import base64
+import random
+import hashlib
 import subprocess
+import httpx
+import openai
 from openai import OpenAI
 from pathlib import Path
 import wave
 import time
-import tempfile
 import shutil
+import threading
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+try:
+    from spleeter.separator import Separator as SpleeterSeparator
+    SPLEETER_AVAILABLE = True
+except ImportError:
+    SPLEETER_AVAILABLE = False
+
+try:
+    from scipy.signal import resample_poly
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# Transient API failures worth retrying with backoff
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    TimeoutError,
+)
+
+# Failures that will not fix themselves on retry
+_FATAL_ERRORS = (
+    openai.AuthenticationError,
+    openai.PermissionDeniedError,
+    openai.BadRequestError,
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _wav_duration(path, mtime_ns, size):
+    """WAV duration from the header; keyed on mtime/size so rewritten files are re-read"""
+    with wave.open(path, "rb") as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+class _RateLimiter:
+    """Thread-safe sliding-window limiter on requests per minute"""
+    
+    def __init__(self, requests_per_minute=None):
+        self.rpm = requests_per_minute
+        self._sent = deque()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until another request fits in the current one-minute window"""
+        if not self.rpm:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= 60:
+                    self._sent.popleft()
+                if len(self._sent) < self.rpm:
+                    self._sent.append(now)
+                    return
+                wait = 60 - (now - self._sent[0])
+            time.sleep(wait)
+
+
+# Per-user cache location (XDG), so the app doesn't drop a cache wherever it is started
+_DEFAULT_CACHE_DIR = os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "tts_generator")
+
+
+class _AudioCache:
+    """
+    Persistent cache of generated sentence audio, one WAV per key
+    Least recently used entries (by mtime, refreshed on every hit) are pruned once
+    the directory grows past max_bytes
+    """
+    
+    def __init__(self, cache_dir=_DEFAULT_CACHE_DIR, max_bytes=2 * 1024 ** 3):
+        os.makedirs(cache_dir, exist_ok=True)
+        self._dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = sum(size for _, size, _ in self._entries())
+    
+    @staticmethod
+    def key(*parts):
+        return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _entries(self):
+        """(path, size, mtime) of every cached WAV"""
+        entries = []
+        with os.scandir(self._dir) as it:
+            for entry in it:
+                if entry.name.endswith(".wav"):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((entry.path, st.st_size, st.st_mtime))
+        return entries
+    
+    def get(self, key):
+        """Path of the cached WAV, or None"""
+        path = os.path.join(self._dir, f"{key}.wav")
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            return None
+        return path
+    
+    def put(self, key, wav_path):
+        """Store a finished WAV (copied, not linked: the source may be rewritten later)"""
+        tmp = os.path.join(self._dir, f"{key}.{threading.get_ident()}.tmp")
+        try:
+            shutil.copyfile(wav_path, tmp)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, os.path.join(self._dir, f"{key}.wav"))
+        except OSError:
+            return
+        
+        with self._lock:
+            self._size += size
+            if self._size > self.max_bytes:
+                self._prune()
+    
+    def _prune(self):
+        """Delete least recently used entries down to 90% of max_bytes (caller holds the lock)"""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+
+class _WavStreamWriter:
+    """Decode streamed base64 audio fragments straight into a PCM WAV file"""
+    
+    def __init__(self, path, sample_rate, channels, sample_width):
+        self._wav = wave.open(path, "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(sample_width)
+        self._wav.setframerate(sample_rate)
+        self._frame_size = channels * sample_width
+        self._sample_rate = sample_rate
+        self._b64_tail = ""
+        self._carry = b""
+        self._header = b""  # leading bytes until we know whether a RIFF header is present
+        self.frames = 0
+    
+    @property
+    def duration(self):
+        return self.frames / self._sample_rate
+    
+    def feed_b64(self, fragment):
+        """Decode whatever complete 4-character base64 groups are available"""
+        data = self._b64_tail + fragment
+        cut = len(data) - len(data) % 4
+        self._b64_tail = data[cut:]
+        if cut:
+            self._write(base64.b64decode(data[:cut]))
+    
+    def _write(self, chunk):
+        if self._header is not None:
+            # Some responses are a complete WAV file: skip its header
+            self._header += chunk
+            if len(self._header) < 4:
+                return
+            if self._header.startswith(b"RIFF"):
+                idx = self._header.find(b"data", 12)
+                if idx < 0 or len(self._header) < idx + 8:
+                    return
+                chunk = self._header[idx + 8:]
+            else:
+                chunk = self._header
+            self._header = None
+        
+        chunk = self._carry + chunk
+        usable = len(chunk) - len(chunk) % self._frame_size
+        self._carry = chunk[usable:]
+        if usable:
+            self._wav.writeframes(chunk[:usable])
+            self.frames += usable // self._frame_size
+    
+    def close(self):
+        if self._header:
+            # Very short raw payload that never reached the header check
+            header, self._header = self._header, None
+            self._write(header)
+        self._wav.close()
+
 
 class TTSGenerator:
     """Text-to-Speech Generator – Enhanced Version (Multilingual Support)"""
@@ -69,13 +277,19 @@ class TTSGenerator:
         }
     }
     
-    def __init__(self, api_key=None, api_base=None):
+    def __init__(self, api_key=None, api_base=None, max_requests_per_minute=None, upload_reference=False,
+                 cache_dir=_DEFAULT_CACHE_DIR):
         """
         Initialize the TTS Generator
         
         Args:
             api_key: API key
             api_base: API base URL
+            max_requests_per_minute: Optional TTS request throttle (None = unlimited)
+            upload_reference: Upload the cloning reference once and send its file id
+                instead of inline base64 (only for backends that support it)
+            cache_dir: Directory of the on-disk sentence audio cache (default ~/.cache/tts_generator,
+                capped at 2 GB with least-recently-used pruning; None disables caching)
         """
         self.api_key = api_key or os.getenv("BOSON_API_KEY", "bai-4RckqUuoLpgxtUFcgT4fMwHQddd-dR0_AZOxII6UOZhPmR1s")
         self.api_base = api_base or "https://hackathon.boson.ai/v1"
@@ -86,6 +300,29 @@ class TTSGenerator:
         self.SAMPLE_WIDTH = 2
         
         self.client = None
+        self._http_client = None
+        self._limiter = _RateLimiter(max_requests_per_minute)
+        self._ref_b64_cache = {}
+        self._ref_digests = {}
+        # Sentences that got no usable audio from any retry with a given voice: re-running
+        # generate() on this instance leaves them silent instead of paying for them again.
+        # API errors are never recorded, so an outage doesn't silence sentences
+        self._failed_texts = set()
+        self.cache_dir = cache_dir
+        self._audio_cache = None
+        self.upload_reference = upload_reference
+        self._ref_file_ids = {}
+        self._ref_upload_lock = threading.Lock()
+        # Ask for audio only (no text tokens to generate); falls back to text+audio
+        # the first time the backend rejects it
+        self._modalities = ["audio"]
+        
+        # Prompts depend only on (language, voice): build them all once
+        self._preset_prompts = {
+            (lang, voice): self._get_system_prompt(lang, voice)
+            for lang in self.LANGUAGE_CONFIGS for voice in self.PRESET_VOICES
+        }
+        self._clone_prompts = {lang: self._get_clone_prompt(lang) for lang in self.LANGUAGE_CONFIGS}
     
     def _init_client(self):
         """Initialize Boson AI TTS client"""
@@ -93,9 +330,23 @@ class TTSGenerator:
             return
         
         print("🔄 Initializing Boson AI TTS client...")
-        self.client = OpenAI(api_key=self.api_key, base_url=self.api_base)
+        # One pooled keep-alive client shared by all worker threads (thread-safe);
+        # with h2 installed the parallel sentences multiplex over one connection
+        self._http_client = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+        self.client = OpenAI(api_key=self.api_key, base_url=self.api_base, http_client=self._http_client)
         print("✅ Client initialized successfully")
     
+    def close(self):
+        """Release the HTTP connection pool (the client is recreated on the next generate)"""
+        if self._http_client is not None:
+            self._http_client.close()
+        self._http_client = None
+        self.client = None
+    
     def _get_system_prompt(self, target_lang, voice_type):
         """
         Generate system prompt based on target language and voice type
@@ -123,12 +374,36 @@ class TTSGenerator:
             )
         return system_prompt
     
+    def _get_clone_prompt(self, target_lang):
+        """
+        Generate voice-cloning system prompt based on target language
+        """
+        lang_config = self.LANGUAGE_CONFIGS.get(target_lang, self.LANGUAGE_CONFIGS["en"])
+        
+        if target_lang == "en":
+            return (
+                "You are a voice cloning assistant. "
+                "Clone the voice from the reference audio and speak the new text "
+                "naturally and fluently in English with the same tone, accent, and speaking style."
+            )
+        return (
+            f"You are a multilingual voice cloning assistant. "
+            f"Clone the voice from the reference audio and speak the new text "
+            f"in {lang_config['name']} naturally and fluently "
+            f"while preserving the same tone, rhythm, and style. "
+            f"IMPORTANT: The output audio MUST be in {lang_config['name']}, not English."
+        )
+    
     def generate(self, translated_json_path, output_audio_path, target_lang="en", 
                  bitrate="192k", original_audio_path=None, 
                  voice_mode="clone", preset_voice="female_american",
-                 separate_vocals=False, keep_background=True, bgm_volume=0.18):
+                 separate_vocals=False, keep_background=True, bgm_volume=0.18,
+                 max_concurrency=8):
         """
         Generate full audio from the translated JSON file
+        
+        Args:
+            max_concurrency: Maximum number of sentences synthesized in parallel
         """
         if not os.path.exists(translated_json_path):
             print(f"❌ Input file not found: {translated_json_path}")
@@ -136,12 +411,15 @@ class TTSGenerator:
         
         try:
             self._init_client()
+            self._audio_cache = _AudioCache(self.cache_dir) if self.cache_dir else None
             
             with open(translated_json_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
             sentences = data[0].get("sentence_info", [])
             total = len(sentences)
+            # Timings as arrays once, instead of dict lookups in every pass over the sentences
+            starts, ends = self._sentence_timings(sentences)
             
             print("=" * 80)
             print(f"🔊 Starting generation of {total} audio segments...")
@@ -156,6 +434,7 @@ class TTSGenerator:
             reference_audio = None
             reference_text = None
             bgm_path = None
+            bgm_future = None
             
             # Step 1: Handle source audio (voice extraction)
             if original_audio_path and os.path.exists(original_audio_path):
@@ -175,11 +454,11 @@ class TTSGenerator:
                     else:
                         source_for_reference = original_audio_path
                     
-                    ref_result = self._find_best_reference(sentences)
+                    ref_result = self._find_best_reference(sentences, timings=(starts, ends))
                     if ref_result:
                         ref_idx, ref_sent, ref_duration = ref_result
                         ref_text = ref_sent.get("text", "")
-                        ref_start = ref_sent.get("start", 0)
+                        ref_start = float(starts[ref_idx])
                         
                         reference_audio = str(temp_dir / "reference.wav")
                         
@@ -190,11 +469,13 @@ class TTSGenerator:
                             reference_audio = None
                 
                 elif separate_vocals and keep_background:
-                    print("\n🎧 Step 1: Extracting background music")
+                    print("\n🎧 Step 1: Extracting background music (alongside sentence generation)")
                     print("-" * 80)
-                    _, bgm_path = self._separate_audio(original_audio_path, str(temp_dir))
-                    if bgm_path:
-                        print(f"✅ Background music: {bgm_path}")
+                    # Preset voices don't need the vocals and the music is only used in Step 4,
+                    # so separation runs while the sentences are being synthesized
+                    separation_pool = ThreadPoolExecutor(max_workers=1)
+                    bgm_future = separation_pool.submit(self._separate_audio, original_audio_path, str(temp_dir))
+                    separation_pool.shutdown(wait=False)
             
             # Step 2: Generate audio for each sentence
             print("\n🎤 Step 2: Generating sentence audio")
@@ -202,73 +483,69 @@ class TTSGenerator:
             
             audio_segments = []
             success_count = 0
+            field_name = "text_en" if target_lang == "en" else "text_translated"
             
+            # Repeated lines ("okay", "thank you") are synthesized once; voice, language
+            # and reference are fixed for the whole call, so the text alone is the key
+            jobs_by_text = {}
             for i, sentence in enumerate(sentences, 1):
-                text = sentence.get("text_en", "") if target_lang == "en" else sentence.get("text_translated", "")
-                start_time = sentence.get("start", 0)
-                end_time = sentence.get("end", 0)
-                target_duration = end_time - start_time
-                
+                text = sentence.get(field_name, "")
                 if not text or "[FAILED:" in text:
                     print(f"  [{i}/{total}] ⏭️  Skipped")
                     continue
-                
-                display = text if len(text) <= 45 else text[:42] + "..."
-                print(f"  [{i}/{total}] {display}")
-                
-                raw_output = str(temp_dir / f"raw_{i:03d}.wav")
-                final_output = str(temp_dir / f"segment_{i:03d}.wav")
-                
-                if voice_mode == "clone" and reference_audio and reference_text:
-                    if self._generate_with_voice_cloning(text, reference_audio, reference_text, raw_output, target_lang, target_duration):
-                        raw_duration = self._get_audio_duration(raw_output)
-                        print(f"    🎵 Generated: {raw_duration:.1f}s")
-                        if self._align_audio_duration(raw_output, target_duration, final_output):
-                            audio_segments.append((start_time, final_output))
-                            success_count += 1
-                    else:
-                        print("    ❌ Generation failed")
-                
-                elif voice_mode == "preset":
-                    if self._generate_with_preset_voice(text, preset_voice, raw_output, target_lang, target_duration):
-                        raw_duration = self._get_audio_duration(raw_output)
-                        print(f"    🎵 Generated: {raw_duration:.1f}s")
-                        if self._align_audio_duration(raw_output, target_duration, final_output):
-                            audio_segments.append((start_time, final_output))
-                            success_count += 1
-                    else:
-                        print("    ❌ Generation failed")
-                
-                else:
-                    if self._create_silence(target_duration, final_output):
-                        audio_segments.append((start_time, final_output))
-                
-                if i < total:
-                    time.sleep(0.3)
+                jobs_by_text.setdefault(text.strip(), []).append((i, text, float(starts[i - 1]), float(ends[i - 1])))
+            
+            # Sentences are independent, so synthesize them concurrently
+            # (the API is network/GPU-bound; rate limiting replaces the fixed sleep)
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                futures = {
+                    executor.submit(
+                        self._render_segment, repeats[0], total, temp_dir, voice_mode, preset_voice,
+                        reference_audio, reference_text, target_lang
+                    ): repeats
+                    for repeats in jobs_by_text.values()
+                }
+                for future in as_completed(futures):
+                    segment, generated = future.result()
+                    if segment:
+                        audio_segments.append(segment)
+                        success_count += generated
+                        # Same audio at the other occurrences, aligned to each slot
+                        for job in futures[future][1:]:
+                            print(f"  [{job[0]}/{total}] ♻️  Reusing audio of sentence {futures[future][0][0]}")
+                            audio_segments.append(self._reuse_segment(segment, job))
+                            success_count += generated
             
             print(f"\n✅ Audio generation completed: {success_count}/{total}")
             
-            total_duration = sentences[-1].get("end", 0) if sentences else 60
+            total_duration = float(ends[-1]) if sentences else 60
             
-            # Step 3: Assemble timeline
+            # Step 3: Assemble timeline (one ffmpeg pass for speed changes, placement in NumPy;
+            # the track stays in memory through mixing and is piped straight into the encoder)
             print("\n🔄 Step 3: Assembling audio timeline")
             print("-" * 80)
-            speech_only = str(temp_dir / "speech_only.wav")
             
-            if self._assemble_audio_timeline(audio_segments, total_duration, speech_only):
-                print(f"✅ Speech track complete: {speech_only}")
+            placed = self._stretch_segments(audio_segments, temp_dir)
+            speech = self._assemble_audio_timeline_np(placed, total_duration)
+            if speech is not None:
+                print(f"✅ Speech track complete ({speech.size / self.SAMPLE_RATE:.1f}s)")
+                
+                if bgm_future is not None:
+                    _, bgm_path = bgm_future.result()
+                    if bgm_path:
+                        print(f"✅ Background music: {bgm_path}")
                 
                 if keep_background and bgm_path and os.path.exists(bgm_path):
                     print("\n🎵 Step 4: Mixing background audio")
                     print("-" * 80)
-                    temp_output = str(temp_dir / "with_bgm.wav")
-                    if self._mix_audio_with_bgm(speech_only, bgm_path, temp_output, bgm_volume):
-                        speech_only = temp_output
+                    mixed = self._mix_audio_with_bgm(speech, bgm_path, bgm_volume)
+                    if mixed is not None:
+                        speech = mixed
                         print("✅ Background mixing complete")
                 
                 print("\n🔄 Step 5: Converting to MP3")
                 print("-" * 80)
-                self._convert_to_mp3(speech_only, output_audio_path, bitrate)
+                self._convert_to_mp3(speech, output_audio_path, bitrate)
                 
                 print(f"💾 Audio saved: {output_audio_path}")
                 print("=" * 80)
@@ -284,24 +561,140 @@ class TTSGenerator:
             import traceback
             traceback.print_exc()
             return False
+        
+        finally:
+            self.close()
     
 
+    def _render_segment(self, job, total, temp_dir, voice_mode, preset_voice,
+                        reference_audio, reference_text, target_lang):
+        """
+        Generate and align the audio for one sentence (runs in a worker thread)
+        
+        Returns:
+            tuple: ((start_time, raw_path, align_filter, trim_to) or None, whether speech was generated)
+        """
+        i, text, start_time, end_time = job
+        target_duration = end_time - start_time
+        
+        display = text if len(text) <= 45 else text[:42] + "..."
+        print(f"  [{i}/{total}] {display}")
+        
+        raw_output = str(temp_dir / f"raw_{i:03d}.wav")
+        
+        # Identifies the voice across runs: the preset name, or the reference audio's content
+        voice_id = None
+        if voice_mode == "preset":
+            voice_id = preset_voice
+        elif reference_audio and reference_text:
+            try:
+                voice_id = self._get_reference_digest(reference_audio)
+            except OSError:
+                voice_id = None
+        
+        failure_key = (text.strip(), voice_mode, voice_id, target_lang)
+        if voice_id is not None and failure_key in self._failed_texts:
+            print(f"  [{i}/{total}] ⏭️  Failed in an earlier run with this voice, leaving silence")
+            return None, False
+        
+        cache_key = None
+        if self._audio_cache and voice_id is not None:
+            if voice_mode == "preset":
+                prompt = self._preset_prompts.get((target_lang, preset_voice), "")
+            else:
+                prompt = self._clone_prompts.get(target_lang, "")
+            cache_key = _AudioCache.key(self.model, voice_mode, voice_id, prompt, target_lang, text.strip())
+            cached = self._audio_cache.get(cache_key)
+            if cached:
+                raw_duration = self._get_audio_duration(cached)
+                if raw_duration > 0:
+                    print(f"  [{i}/{total}] 💾 Cached audio: {raw_duration:.1f}s")
+                    align, trim_to = self._align_filter(raw_duration, target_duration)
+                    return (start_time, cached, align, trim_to), True
+        
+        if voice_mode == "clone" and reference_audio and reference_text:
+            raw_duration, verdict = self._generate_with_voice_cloning(text, reference_audio, reference_text, raw_output, target_lang, target_duration)
+        elif voice_mode == "preset":
+            raw_duration, verdict = self._generate_with_preset_voice(text, preset_voice, raw_output, target_lang, target_duration)
+        else:
+            # No voice available: the timeline is silent there anyway
+            return None, False
+        
+        # The generators report the streamed length, so the file isn't probed again
+        if not raw_duration:
+            if verdict == "failed" and voice_id is not None:
+                self._failed_texts.add(failure_key)
+            print(f"  [{i}/{total}] ❌ Generation failed")
+            return None, False
+        
+        print(f"  [{i}/{total}] 🎵 Generated: {raw_duration:.1f}s")
+        # Last-resort takes that failed the duration checks are used for this run only,
+        # so a later run gets another chance to generate a good one
+        if cache_key and verdict == "accepted":
+            self._audio_cache.put(cache_key, raw_output)
+        align, trim_to = self._align_filter(raw_duration, target_duration)
+        return (start_time, raw_output, align, trim_to), True
+    
+    def _reuse_segment(self, segment, job):
+        """Place audio already generated for an identical sentence into another slot"""
+        raw_output = segment[1]
+        i, text, start_time, end_time = job
+        align, trim_to = self._align_filter(self._get_audio_duration(raw_output), end_time - start_time)
+        return start_time, raw_output, align, trim_to
+    
+    # Overrun (seconds) short enough to cut from a segment's tail instead of speeding it up
+    MAX_TRIM_SECONDS = 0.5
+    # ...and as a share of the take, so a short segment never loses a large part of itself
+    MAX_TRIM_FRACTION = 0.2
+    
+    # Segments per speed-adjustment ffmpeg run (each input is an open file and argv entries)
+    MAX_STRETCH_INPUTS = 64
+    
+    # In-process Spleeter model, loaded once per process
+    _separator = None
+    _separator_lock = threading.Lock()
+    
+    @classmethod
+    def _get_separator(cls):
+        """Lazily load the Spleeter 2-stem separator (shared by all instances)"""
+        with cls._separator_lock:
+            if cls._separator is None:
+                cls._separator = SpleeterSeparator("spleeter:2stems")
+            return cls._separator
+    
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _has_tool(cls, name):
+        """Whether an executable is on PATH (checked once per process)"""
+        return shutil.which(name) is not None
+    
     # (All helper methods below have been translated too)
     def _separate_audio(self, input_audio, output_dir):
-        """Separate vocals and background using Demucs"""
-        try:
-            subprocess.run(["demucs", "--help"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        except:
+        """Separate vocals and background (in-process Spleeter, else Demucs CLI)"""
+        if SPLEETER_AVAILABLE:
+            try:
+                self._get_separator().separate_to_file(
+                    input_audio, output_dir, codec="wav", filename_format="{instrument}.{codec}"
+                )
+                vocals = Path(output_dir) / "vocals.wav"
+                bgm = Path(output_dir) / "accompaniment.wav"
+                return str(vocals) if vocals.exists() else None, str(bgm) if bgm.exists() else None
+            except Exception as e:
+                print(f"⚠️  Spleeter separation failed ({e}), trying Demucs")
+        
+        if not self._has_tool("demucs"):
             print("⚠️  Demucs not installed, skipping separation")
             print("   Tip: pip install demucs")
             return None, None
         
         try:
             audio_name = Path(input_audio).stem
-            subprocess.run(["demucs", "-n", "htdemucs", "--two-stems=vocals", input_audio],
+            # Write stems under output_dir (not ./separated in the working directory),
+            # so the moves below stay on one filesystem and cleanup removes them
+            subprocess.run(["demucs", "-n", "htdemucs", "--two-stems=vocals", "-o", str(output_dir), input_audio],
                            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
-            separated_root = Path("separated") / "htdemucs" / audio_name
+            separated_root = Path(output_dir) / "htdemucs" / audio_name
             vocals = separated_root / "vocals.wav"
             bgm = separated_root / "no_vocals.wav"
             
@@ -309,12 +702,12 @@ class TTSGenerator:
             final_bgm = Path(output_dir) / "accompaniment.wav"
             
             if vocals.exists():
-                shutil.copy(vocals, final_vocals)
+                self._move_file(vocals, final_vocals)
             else:
                 final_vocals = None
             
             if bgm.exists():
-                shutil.copy(bgm, final_bgm)
+                self._move_file(bgm, final_bgm)
             else:
                 final_bgm = None
             
@@ -324,53 +717,63 @@ class TTSGenerator:
             print(f"⚠️  Vocal separation failed: {e}")
             return None, None
 
+    @staticmethod
+    def _move_file(src, dst):
+        """Move a file without copying its bytes when both paths share a filesystem"""
+        try:
+            os.replace(src, dst)
+        except OSError:
+            # Cross-device: fall back to copy + delete
+            shutil.move(str(src), str(dst))
+    
     def _generate_with_preset_voice(self, text, voice_type, output_path, target_lang="en", target_duration=None, max_retries=10):
-        """Generate audio using preset voice (supports multiple languages)"""
+        """
+        Generate audio using preset voice (supports multiple languages)
+        
+        Returns:
+            tuple: (duration of the audio written to output_path or False, verdict)
+                   verdict is "accepted", "rejected" (last-resort take that failed the
+                   duration checks), "failed" (no usable audio after every retry) or
+                   "error" (API/network/IO error, may succeed on a later call)
+        """
         if not text.strip():
-            return False
+            return False, "failed"
         
         voice_config = self.PRESET_VOICES.get(voice_type, self.PRESET_VOICES["female_american"])
-        # Get system prompt matching the target language
-        system_prompt = self._get_system_prompt(target_lang, voice_type)
+        # Get (precomputed) system prompt matching the target language
+        system_prompt = self._preset_prompts.get((target_lang, voice_type)) or self._get_system_prompt(target_lang, voice_type)
+        # Same request body on every retry: build it once
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text.strip()}
+        ]
         
         for attempt in range(max_retries):
             try:
                 # Record start time
+                self._limiter.acquire()
                 start_time = time.time()
                 
-                response = self.client.chat.completions.create(
+                duration = self._stream_audio(
+                    output_path,
+                    max_seconds=self._abort_after(target_duration, attempt, max_retries),
                     model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": system_prompt  # Dynamically generated prompt
-                        },
-                        {"role": "user", "content": text.strip()}
-                    ],
-                    modalities=["text", "audio"],
+                    messages=messages,
                     max_completion_tokens=2048,
-                    temperature=voice_config["temperature"],
+                    temperature=self._jitter_temperature(voice_config["temperature"], attempt),
                     top_p=0.9,
-                    stream=False,
                     timeout=30  # Add 30-second timeout
                 )
                 
                 # Calculate generation time
                 generation_time = time.time() - start_time
                 
-                audio_b64 = getattr(response.choices[0].message.audio, "data", None)
-                if not audio_b64:
+                if not duration:
                     if attempt < max_retries - 1:
                         print(f"    ⚠️  No audio response, retrying {attempt+1}/{max_retries} ...")
-                        time.sleep(3)
                         continue
-                    return False
+                    return False, "failed"
                 
-                tmp_output = tempfile.NamedTemporaryFile(delete=False, suffix=".wav").name
-                with open(tmp_output, "wb") as f:
-                    f.write(base64.b64decode(audio_b64))
-                
-                duration = self._get_audio_duration(tmp_output)
                 if target_duration is not None and target_duration > 0:
                     duration_ratio = duration / target_duration
                     
@@ -381,10 +784,9 @@ class TTSGenerator:
                         print(f"    ⚠️  Abnormally long audio ({duration:.1f}s)")
                         if attempt < max_retries - 1:
                             print(f"    🔄 Regenerating ({attempt + 2}/{max_retries})...")
-                            time.sleep(1)
                             continue
                         else:
-                            return True
+                            return duration, "rejected"
                     
                     # Duration ratio check
                     if 0.5 <= duration_ratio <= 2.2:
@@ -392,7 +794,7 @@ class TTSGenerator:
                             print(f"    ✅ Perfect duration match")
                         else:
                             print(f"    ✅ Reasonable duration, suggested speed adjustment {duration_ratio:.2f}x")
-                        return True
+                        return duration, "accepted"
                     else:
                         if duration_ratio < 0.5:
                             print(f"    ⚠️  Too short ({duration_ratio:.2f}x < 0.5x)")
@@ -401,160 +803,321 @@ class TTSGenerator:
                         
                         if attempt < max_retries - 1:
                             print(f"    🔄 Regenerating ({attempt + 2}/{max_retries})...")
-                            time.sleep(1)
                             continue
                         else:
                             print(f"    ⚠️  Max retries reached — returning result (requires forced speed adjustment)")
-                            return True
+                            return duration, "rejected"
                 else:    
                 # Check for abnormal generation
                 # 1. Abnormal duration (too long or too short)
                     if duration > 20 or duration < 0.5:
-                        os.remove(tmp_output)
+                        os.remove(output_path)
                         if attempt < max_retries - 1:
                             print(f"    ⚠️  Abnormal duration {duration:.1f}s, regenerating...")
-                            time.sleep(3)
                             continue
-                        return False
+                        return False, "failed"
                     
                     # 2. Excessive generation time (>30 seconds)
                     if generation_time > 30:
                         print(f"    ⚠️  Generation took too long ({generation_time:.1f}s), possible issue")
                         # If audio appears fine, still use it
                         if duration < 1 or duration > 15:
-                            os.remove(tmp_output)
+                            os.remove(output_path)
                             if attempt < max_retries - 1:
                                 print(f"    ⚠️  Regenerating...")
-                                time.sleep(3)
                                 continue
-                            return False
+                            return False, "failed"
                 
-                os.rename(tmp_output, output_path)
-                return True
-            
-            except TimeoutError:
-                print(f"    ⚠️  Request timed out, retrying {attempt+1}/{max_retries} ...")
-                if attempt < max_retries - 1:
-                    time.sleep(5)
-                else:
-                    return False
+                return duration, "accepted"
             
             except Exception as e:
-                error_msg = str(e)
-                if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                    print(f"    ⚠️  Timeout error, retrying {attempt+1}/{max_retries} ...")
-                elif attempt < max_retries - 1:
-                    print(f"    ⚠️  Error: {error_msg[:60]}, retrying...")
-                else:
-                    print(f"    ❌ Error: {error_msg[:60]}")
-                    return False
-                
-                if attempt < max_retries - 1:
-                    time.sleep(3)
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt == max_retries - 1:
+                    print(f"    ❌ Error: {str(e)[:60]}")
+                    return False, "error"
+                print(f"    ⚠️  {self._error_kind(e)}: {str(e)[:60]}, retrying in {delay:.1f}s ({attempt+1}/{max_retries}) ...")
+                time.sleep(delay)
         
-        return False
+        return False, "failed"
     
-    def _align_audio_duration(self, input_file, target_duration, output_file):
-        """Adjust audio duration for precise alignment"""
-        try:
-            actual_duration = self._get_audio_duration(input_file)
-            
-            if actual_duration <= 0:
-                return False
-            
-            ratio = target_duration / actual_duration
-            
-            # If close enough, use directly
-            if 0.9 <= ratio <= 1.1:
-                shutil.copy(input_file, output_file)
-                return True
-            
-            # Adjust speed if needed
-            if ratio < 2.2:
-                speed = 1.0 / ratio
-                return self._change_audio_speed(input_file, output_file, speed)
-            
-            # If too different, pad silence or truncate
-            if ratio >= 2.2:
-                return self._pad_silence(input_file, output_file, target_duration - actual_duration)
-            else:
-                # Truncate
-                shutil.copy(input_file, output_file)
-                return True
+    def _align_filter(self, actual_duration, target_duration):
+        """
+        How to fit a segment into its subtitle slot
         
-        except:
-            return False
+        Returns:
+            tuple: (atempo filter chain, "" = keep tempo; seconds to cut the segment to, or None)
+        """
+        if actual_duration <= 0 or target_duration <= 0:
+            return "", None
+        
+        ratio = target_duration / actual_duration
+        
+        # Within ±15% the tempo difference is not noticeable: use directly
+        if 0.85 <= ratio <= 1.15:
+            return "", None
+        
+        # Slightly too long: cutting the (mostly silent) tail beats a tempo change
+        overrun = actual_duration - target_duration
+        if 0 < overrun <= min(self.MAX_TRIM_SECONDS, self.MAX_TRIM_FRACTION * actual_duration):
+            return "", target_duration
+        
+        # Adjust speed if needed
+        if ratio < 2.2:
+            return self._atempo_chain(1.0 / ratio), None
+        
+        # Much shorter than the slot: the gap after it is already silence on the timeline
+        return "", None
     
-    def _change_audio_speed(self, input_file, output_file, speed):
-        """Change playback speed of audio"""
-        try:
-            subprocess.run(
-                ["ffmpeg", "-y", "-i", input_file, "-filter:a", f"atempo={speed}", output_file],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True
-            )
-            return True
-        except:
-            return False
+    def _atempo_chain(self, speed):
+        """Split a speed factor into atempo stages within the 0.5–2.0 range each accepts"""
+        stages = []
+        while speed > 2.0:
+            stages.append("atempo=2.0")
+            speed /= 2.0
+        while speed < 0.5:
+            stages.append("atempo=0.5")
+            speed /= 0.5
+        stages.append(f"atempo={speed:.6f}")
+        return ",".join(stages)
     
-    def _pad_silence(self, input_file, output_file, pad_seconds):
-        """Add silence padding to the end of audio"""
+    def _stretch_segments(self, audio_segments, temp_dir):
+        """
+        Apply the segments' speed changes in multi-output ffmpeg runs
+        
+        Segments that need no change and are already 24 kHz mono PCM16 are
+        passed through untouched; the rest are (re)encoded to that format,
+        at most MAX_STRETCH_INPUTS per ffmpeg run (open files / argv size).
+        If a run fails its segments are retried one by one, so a single bad
+        file only drops that segment.
+        
+        Args:
+            audio_segments: List of (start_time, wav_path, align_filter, trim_to)
+        
+        Returns:
+            list: (start_time, wav_path, trim_to) ready for timeline placement
+        """
+        placed = []
+        jobs = []
+        
+        for start_time, audio_file, align, trim_to in audio_segments:
+            if not align and self._is_native_wav(audio_file):
+                placed.append((start_time, audio_file, trim_to))
+                continue
+            # Indexed name: a reused raw file may be stretched differently per slot
+            stretched = str(Path(temp_dir) / f"segment_{len(jobs):03d}_{Path(audio_file).stem}.wav")
+            jobs.append((audio_file, align, stretched))
+            placed.append((start_time, stretched, trim_to))
+        
+        failed = set()
+        for i in range(0, len(jobs), self.MAX_STRETCH_INPUTS):
+            chunk = jobs[i:i + self.MAX_STRETCH_INPUTS]
+            if self._run_stretch(chunk):
+                continue
+            for job in chunk:
+                if len(chunk) == 1 or not self._run_stretch([job]):
+                    print(f"⚠️  Speed adjustment failed: {Path(job[0]).name}")
+                    failed.add(job[2])
+        
+        return [seg for seg in placed if seg[1] not in failed]
+    
+    def _run_stretch(self, jobs):
+        """
+        Run one ffmpeg invocation for a list of (input, align_filter, output) jobs
+        
+        Returns:
+            bool: Whether ffmpeg succeeded
+        """
+        cmd = ["ffmpeg", "-y"]
+        graph = []
+        outputs = []
+        for k, (audio_file, align, stretched) in enumerate(jobs):
+            cmd += ["-i", audio_file]
+            graph.append(f"[{k}:a]{align or 'anull'}[o{k}]")
+            outputs += [
+                "-map", f"[o{k}]",
+                "-ar", str(self.SAMPLE_RATE),
+                "-ac", str(self.CHANNELS),
+                "-c:a", "pcm_s16le",
+                stretched
+            ]
+        
         try:
-            subprocess.run(
-                ["ffmpeg", "-y", "-i", input_file, "-af", f"apad=pad_dur={pad_seconds}", output_file],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True
-            )
+            subprocess.run(cmd + ["-filter_complex", ";".join(graph)] + outputs,
+                           check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             return True
-        except:
+        except Exception:
             return False
     
-    def _mix_audio_with_bgm(self, speech, bgm, output_path, volume=0.2):
-        """Mix speech with background music"""
+    def _is_native_wav(self, audio_file):
+        """Whether a file is already PCM16 WAV at the module's rate and channel count"""
         try:
-            subprocess.run(
-                [
-                    "ffmpeg", "-y",
-                    "-i", speech,
-                    "-i", bgm,
-                    "-filter_complex",
-                    f"[1:a]volume={volume}[bgm];[0:a][bgm]amix=inputs=2:duration=first",
-                    output_path
-                ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True
-            )
-            return True
-        except:
+            with wave.open(audio_file, 'rb') as wav:
+                return (wav.getnchannels() == self.CHANNELS and wav.getframerate() == self.SAMPLE_RATE
+                        and wav.getsampwidth() == self.SAMPLE_WIDTH)
+        except (OSError, wave.Error, EOFError):
             return False
     
-    def _find_best_reference(self, sentences, min_duration=3.0, max_duration=6.0):
-        """Find the most suitable sentence as reference"""
-        candidates = []
+    def _assemble_audio_timeline_np(self, audio_segments, total_duration):
+        """
+        Assemble final audio based on timeline alignment (vectorized with NumPy)
         
-        for i, sent in enumerate(sentences):
-            duration = sent.get("end", 0) - sent.get("start", 0)
-            text = sent.get("text", "")
+        Returns:
+            np.ndarray: int16 samples of the speech track, or None on failure
+        """
+        try:
+            total_samples = int(total_duration * self.SAMPLE_RATE)
+            # int32 accumulator so overlapping segments can't wrap around
+            timeline = np.zeros(total_samples, dtype=np.int32)
             
-            if min_duration <= duration <= max_duration and len(text) > 8:
-                candidates.append((i, sent, duration))
+            # Sample offsets for all segments in one vectorized step
+            start_samples = (np.fromiter((seg[0] for seg in audio_segments), dtype=np.float64,
+                                         count=len(audio_segments)) * self.SAMPLE_RATE).astype(np.int64)
+            
+            for (start_time, audio_file, trim_to), start in zip(audio_segments, start_samples.tolist()):
+                # One open per segment (libsndfile when available); the format check
+                # comes from the same read instead of a separate header pass
+                try:
+                    samples, rate = self._read_pcm16_mono(audio_file)
+                except Exception:
+                    continue
+                if rate != self.SAMPLE_RATE:
+                    continue
+                
+                if trim_to is not None:
+                    samples = samples[:int(trim_to * self.SAMPLE_RATE)]
+                
+                end = min(start + samples.size, total_samples)
+                if start >= end:
+                    continue
+                timeline[start:end] += samples[:end - start]
+            
+            # Clip in place so only the int16 result is allocated on top of the accumulator
+            np.clip(timeline, -32768, 32767, out=timeline)
+            return timeline.astype(np.int16)
+        
+        except Exception as e:
+            print(f"⚠️  Timeline assembly failed: {e}")
+            return None
+    
+    def _mix_audio_with_bgm(self, speech_pcm, bgm, volume=0.2):
+        """
+        Mix speech samples with background music (vectorized)
         
-        if not candidates:
-            candidates = sorted(
-                [(i, s, s.get("end", 0) - s.get("start", 0)) for i, s in enumerate(sentences)],
-                key=lambda x: x[2],
-                reverse=True
-            )[:3]
+        Args:
+            speech_pcm: int16 speech track at SAMPLE_RATE
+            bgm: Background music file
+        
+        Returns:
+            np.ndarray: Mixed int16 samples, or None if the music can't be read
+        """
+        try:
+            bgm_pcm, bgm_rate = self._read_pcm16_mono(bgm)
+        except Exception as e:
+            print(f"⚠️  Cannot read background music: {e}")
+            return None
+        
+        bgm_pcm = self._resample(bgm_pcm, bgm_rate, self.SAMPLE_RATE)
+        
+        gain = int(round(volume * 32768))
+        # int32 holds sample * gain for volumes up to 1.0; wider only when boosting
+        acc_type = np.int32 if gain <= 32768 else np.int64
+        
+        # Music only under the speech (duration=first), added in place: no full-length bed array
+        mixed = speech_pcm.astype(acc_type)
+        n = min(speech_pcm.size, bgm_pcm.size)
+        bed = bgm_pcm[:n].astype(acc_type)
+        bed *= gain
+        bed >>= 15
+        mixed[:n] += bed
+        del bed
+        # Same levels as the amix=inputs=2 it replaces: each input weighted 1/2 while
+        # both play, speech back at full level once the music has ended
+        mixed[:n] >>= 1
+        
+        np.clip(mixed, -32768, 32767, out=mixed)
+        return mixed.astype(np.int16)
+    
+    def _read_pcm16_mono(self, path):
+        """Read an audio file as mono int16 samples; returns (samples, sample_rate)"""
+        if SOUNDFILE_AVAILABLE:
+            data, rate = sf.read(path, dtype='int16', always_2d=True)
+        else:
+            try:
+                with wave.open(path, 'rb') as wav:
+                    if wav.getsampwidth() != 2:
+                        raise ValueError("only 16-bit WAV is supported without soundfile")
+                    rate = wav.getframerate()
+                    data = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+                    data = data.reshape(-1, wav.getnchannels())
+            except (wave.Error, ValueError, EOFError):
+                # e.g. float WAV without soundfile installed: let ffmpeg decode it
+                return self._decode_pcm16_ffmpeg(path), self.SAMPLE_RATE
+        
+        return self._to_mono(data), rate
+    
+    @staticmethod
+    def _to_mono(data):
+        """Downmix (frames, channels) int16 samples to mono"""
+        if data.shape[1] > 1:
+            return data.mean(axis=1).astype(np.int16)
+        return data[:, 0]
+    
+    def _resample(self, samples, from_rate, to_rate):
+        """Resample int16 samples (polyphase with SciPy, linear interpolation otherwise)"""
+        if from_rate == to_rate or samples.size == 0:
+            return samples
+        if SCIPY_AVAILABLE:
+            g = np.gcd(from_rate, to_rate)
+            out = resample_poly(samples.astype(np.float32), to_rate // g, from_rate // g)
+        else:
+            n_out = int(round(samples.size * to_rate / from_rate))
+            out = np.interp(np.arange(n_out) * (from_rate / to_rate), np.arange(samples.size), samples)
+        return np.clip(out, -32768, 32767).astype(np.int16)
+    
+    def _decode_pcm16_ffmpeg(self, path):
+        """Decode any audio file to mono int16 samples at SAMPLE_RATE via ffmpeg"""
+        result = subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", path,
+             "-f", "s16le", "-ac", "1", "-ar", str(self.SAMPLE_RATE), "pipe:1"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        )
+        return np.frombuffer(result.stdout, dtype=np.int16)
+    
+    @staticmethod
+    def _sentence_timings(sentences):
+        """Start and end times of all sentences as float arrays"""
+        count = len(sentences)
+        starts = np.fromiter((s.get("start", 0) for s in sentences), dtype=np.float64, count=count)
+        ends = np.fromiter((s.get("end", 0) for s in sentences), dtype=np.float64, count=count)
+        return starts, ends
+    
+    def _find_best_reference(self, sentences, min_duration=3.0, max_duration=6.0, timings=None):
+        """
+        Find the most suitable sentence as reference
+        
+        Args:
+            timings: Precomputed (starts, ends) arrays from _sentence_timings
         
-        if candidates:
-            return candidates[0]
-        return None
+        Returns:
+            (index, sentence, duration), or None if there are no sentences
+        """
+        if not sentences:
+            return None
+        
+        starts, ends = timings if timings is not None else self._sentence_timings(sentences)
+        durations = ends - starts
+        text_lens = np.fromiter((len(s.get("text", "")) for s in sentences), dtype=np.int64, count=len(sentences))
+        
+        candidates = np.flatnonzero((durations >= min_duration) & (durations <= max_duration) & (text_lens > 8))
+        # No sentence in range: fall back to the longest one
+        idx = int(candidates[0]) if candidates.size else int(np.argmax(durations))
+        return idx, sentences[idx], float(durations[idx])
     
     def _extract_reference_audio(self, input_audio, start, duration, output_path):
-        """Extract reference audio from original video"""
+        """Extract reference audio from original video (in-process slice, ffmpeg fallback)"""
+        if self._slice_reference_audio(input_audio, start, duration, output_path):
+            return True
+        
         try:
             cmd = [
                 "ffmpeg", "-y",
@@ -570,62 +1133,89 @@ class TTSGenerator:
         except:
             return False
     
+    def _slice_reference_audio(self, input_audio, start, duration, output_path):
+        """
+        Cut the reference window without spawning ffmpeg
+        
+        Seeks straight to the window (no full decode), then downmixes and resamples
+        it to the TTS format. Returns False when the source format can't be read
+        in-process (e.g. MP3 without soundfile), so the caller falls back to ffmpeg.
+        """
+        try:
+            if SOUNDFILE_AVAILABLE:
+                rate = sf.info(input_audio).samplerate
+                data, rate = sf.read(input_audio, start=int(start * rate), frames=int(duration * rate),
+                                     dtype='int16', always_2d=True)
+            else:
+                with wave.open(input_audio, 'rb') as wav:
+                    if wav.getsampwidth() != 2:
+                        return False
+                    rate = wav.getframerate()
+                    wav.setpos(min(int(start * rate), wav.getnframes()))
+                    data = np.frombuffer(wav.readframes(int(duration * rate)), dtype=np.int16)
+                    data = data.reshape(-1, wav.getnchannels())
+        except Exception:
+            return False
+        
+        if data.shape[0] == 0:
+            return False
+        
+        samples = self._resample(self._to_mono(data), rate, self.SAMPLE_RATE)
+        with wave.open(output_path, 'wb') as wav:
+            wav.setnchannels(self.CHANNELS)
+            wav.setsampwidth(self.SAMPLE_WIDTH)
+            wav.setframerate(self.SAMPLE_RATE)
+            wav.writeframes(samples.tobytes())
+        return True
+    
     def _generate_with_voice_cloning(self, text, reference_audio, reference_text, output_path, target_lang="en", target_duration=None, max_retries=5):
-        """Generate speech using voice cloning (supports multiple languages)"""
-        # Get language configuration
-        lang_config = self.LANGUAGE_CONFIGS.get(target_lang, self.LANGUAGE_CONFIGS["en"])
+        """
+        Generate speech using voice cloning (supports multiple languages)
+        
+        Returns:
+            tuple: (duration of the audio written to output_path or False, verdict)
+                   verdict is "accepted", "rejected" (last-resort take that failed the
+                   duration checks), "failed" (no usable audio after every retry) or
+                   "error" (API/network/IO error, may succeed on a later call)
+        """
+        # Reference audio is the same for every sentence: encode (or upload) it once
+        try:
+            ref_input = self._get_reference_input(reference_audio)
+        except OSError as e:
+            print(f"    ❌ Cannot read reference audio: {e}")
+            return False, "error"
+        
+        # Precomputed system prompt for the target language
+        system_prompt = self._clone_prompts.get(target_lang) or self._get_clone_prompt(target_lang)
+        # Same request body on every retry: build it once
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": reference_text},
+            {
+                "role": "assistant",
+                "content": [{
+                    "type": "input_audio",
+                    "input_audio": ref_input
+                }]
+            },
+            {"role": "user", "content": text}
+        ]
         
         for attempt in range(max_retries):
             try:
-                # Record start time
+                # Record start time (after any rate-limit wait)
+                self._limiter.acquire()
                 start_time = time.time()
                 
-                # Read and encode reference audio as base64
-                with open(reference_audio, "rb") as f:
-                    ref_b64 = base64.b64encode(f.read()).decode("utf-8")
-                
-                # Dynamically construct system prompt based on target language
-                if target_lang == "en":
-                    system_prompt = (
-                        "You are a voice cloning assistant. "
-                        "Clone the voice from the reference audio and speak the new text "
-                        "naturally and fluently in English with the same tone, accent, and speaking style."
-                    )
-                else:
-                    system_prompt = (
-                        f"You are a multilingual voice cloning assistant. "
-                        f"Clone the voice from the reference audio and speak the new text "
-                        f"in {lang_config['name']} naturally and fluently "
-                        f"while preserving the same tone, rhythm, and style. "
-                        f"IMPORTANT: The output audio MUST be in {lang_config['name']}, not English."
-                    )
-                
                 # Call API
-                response = self.client.chat.completions.create(
+                duration = self._stream_audio(
+                    output_path,
+                    max_seconds=self._abort_after(target_duration, attempt, max_retries),
                     model=self.model,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": system_prompt  # Dynamically generated prompt
-                        },
-                        {"role": "user", "content": reference_text},
-                        {
-                            "role": "assistant",
-                            "content": [{
-                                "type": "input_audio",
-                                "input_audio": {
-                                    "data": ref_b64,
-                                    "format": "wav"
-                                }
-                            }]
-                        },
-                        {"role": "user", "content": text}
-                    ],
-                    modalities=["text", "audio"],
+                    messages=messages,
                     max_completion_tokens=4096,
-                    temperature=0.85,
+                    temperature=self._jitter_temperature(0.85, attempt),
                     top_p=0.9,
-                    stream=False,
                     stop=["<|eot_id|>", "<|end_of_text|>", "<|audio_eos|>"],
                     extra_body={"top_k": 40},
                     timeout=45  # Add 45-second timeout
@@ -634,17 +1224,8 @@ class TTSGenerator:
                 # Calculate generation time
                 generation_time = time.time() - start_time
                 
-                # Retrieve generated audio
-                if hasattr(response.choices[0].message, 'audio') and response.choices[0].message.audio:
-                    audio_b64 = response.choices[0].message.audio.data
-                    audio_data = base64.b64decode(audio_b64)
-                    
-                    with open(output_path, "wb") as f:
-                        f.write(audio_data)
-                    
-                    # Check for abnormal audio duration
-                    duration = self._get_audio_duration(output_path)
-                    
+                # Generated audio was streamed straight to output_path
+                if duration:
                     # === Intelligent duration validation logic ===
                     if target_duration is not None and target_duration > 0:
                         duration_ratio = duration / target_duration
@@ -656,11 +1237,10 @@ class TTSGenerator:
                             print(f"    ⚠️  Abnormally long audio ({duration:.1f}s)")
                             if attempt < max_retries - 1:
                                 print(f"    🔄 Regenerating ({attempt + 2}/{max_retries})...")
-                                time.sleep(2)
                                 continue
                             else:
                                 # Final attempt — return but mark as needing speed adjustment
-                                return True
+                                return duration, "rejected"
                         
                         # Check 2: Duration ratio validation
                         if 0.5 <= duration_ratio <= 2.2:
@@ -669,7 +1249,7 @@ class TTSGenerator:
                                 print(f"    ✅ Perfect duration match")
                             else:
                                 print(f"    ✅ Reasonable duration, suggested speed adjustment {duration_ratio:.2f}x")
-                            return True
+                            return duration, "accepted"
                         else:
                             # Too large deviation
                             if duration_ratio < 0.5:
@@ -679,12 +1259,11 @@ class TTSGenerator:
                             
                             if attempt < max_retries - 1:
                                 print(f"    🔄 Regenerating ({attempt + 2}/{max_retries})...")
-                                time.sleep(2)
                                 continue
                             else:
                                 # Final attempt — return but requires forced speed adjustment
                                 print(f"    ⚠️  Max retries reached — returning result (requires forced speed adjustment)")
-                                return True
+                                return duration, "rejected"
                     
                     else:
                         # General generation quality checks
@@ -693,7 +1272,6 @@ class TTSGenerator:
                             print(f"    ⚠️  Abnormal duration {duration:.1f}s")
                             if attempt < max_retries - 1:
                                 print(f"    ⚠️  Regenerating...")
-                                time.sleep(2)
                                 continue
                         
                         # 2. Excessive generation time (>45s)
@@ -703,107 +1281,157 @@ class TTSGenerator:
                             if duration < 1 or duration > 20:
                                 if attempt < max_retries - 1:
                                     print(f"    ⚠️  Regenerating...")
-                                    time.sleep(2)
                                     continue
                     
-                    return True
+                    return duration, "accepted"
                 
                 # No audio response
                 if attempt < max_retries - 1:
                     print(f"    ⚠️  No audio response, retrying {attempt+1}/{max_retries} ...")
-                    time.sleep(2)
                     continue
                 
-                return False
-            
-            except TimeoutError:
-                print(f"    ⚠️  Voice cloning timed out, retrying {attempt+1}/{max_retries} ...")
-                if attempt < max_retries - 1:
-                    time.sleep(3)
-                else:
-                    return False
+                return False, "failed"
             
             except Exception as e:
-                error_msg = str(e)
-                if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                    print(f"    ⚠️  Timeout error, retrying {attempt+1}/{max_retries} ...")
-                elif attempt < max_retries - 1:
-                    print(f"    ⚠️  Error: {error_msg[:60]}, retrying...")
-                else:
-                    print(f"    ❌ Cloning failed: {error_msg[:60]}")
-                    return False
-                
-                if attempt < max_retries - 1:
-                    time.sleep(2)
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt == max_retries - 1:
+                    print(f"    ❌ Cloning failed: {str(e)[:60]}")
+                    return False, "error"
+                print(f"    ⚠️  {self._error_kind(e)}: {str(e)[:60]}, retrying in {delay:.1f}s ({attempt+1}/{max_retries}) ...")
+                time.sleep(delay)
         
-        return False
+        return False, "failed"
     
-    def _create_silence(self, duration_seconds, output_path):
-        """Create silent audio of specified duration"""
-        try:
-            num_samples = int(duration_seconds * self.SAMPLE_RATE)
-            silence_data = b'\x00\x00' * num_samples
-            
-            with wave.open(output_path, 'wb') as wav:
-                wav.setnchannels(self.CHANNELS)
-                wav.setsampwidth(self.SAMPLE_WIDTH)
-                wav.setframerate(self.SAMPLE_RATE)
-                wav.writeframes(silence_data)
-            
-            return True
-        except:
-            return False
+    def _get_reference_input(self, reference_audio):
+        """
+        input_audio payload for the cloning reference
+        
+        With upload_reference enabled the file is uploaded once and referenced by id;
+        if the upload is not supported, fall back to the cached inline base64.
+        """
+        if self.upload_reference:
+            key = (reference_audio, os.stat(reference_audio).st_mtime_ns)
+            with self._ref_upload_lock:
+                if key not in self._ref_file_ids:
+                    try:
+                        with open(reference_audio, "rb") as f:
+                            self._ref_file_ids[key] = self.client.files.create(file=f, purpose="user_data").id
+                        print("✅ Reference audio uploaded once for all sentences")
+                    except Exception as e:
+                        print(f"⚠️  Reference upload not supported ({str(e)[:60]}), sending inline audio")
+                        self._ref_file_ids[key] = None
+                file_id = self._ref_file_ids[key]
+            if file_id:
+                return {"file_id": file_id, "format": "wav"}
+        
+        return {"data": self._get_reference_b64(reference_audio), "format": "wav"}
+    
+    def _get_reference_b64(self, reference_audio):
+        """Base64 of the reference audio, cached per (path, mtime)"""
+        key = (reference_audio, os.stat(reference_audio).st_mtime_ns)
+        ref_b64 = self._ref_b64_cache.get(key)
+        if ref_b64 is None:
+            with open(reference_audio, "rb") as f:
+                ref_b64 = base64.b64encode(f.read()).decode("utf-8")
+            self._ref_b64_cache[key] = ref_b64
+        return ref_b64
+    
+    def _retry_delay(self, error, attempt):
+        """
+        Backoff before retrying a failed request
+        
+        Rate limits back off exponentially up to a minute, timeouts and other
+        transient failures start at one second. Returns None for errors that
+        will not go away on retry (bad key, rejected request).
+        """
+        if isinstance(error, _FATAL_ERRORS):
+            return None
+        if isinstance(error, openai.RateLimitError):
+            return min(60, 0.5 * 2 ** attempt) + random.random() * 0.5
+        return min(10, 2 ** attempt) + random.random() * 0.5
+    
+    @staticmethod
+    def _error_kind(error):
+        """Short label for retry log lines"""
+        if isinstance(error, openai.RateLimitError):
+            return "Rate limited"
+        if isinstance(error, (openai.APITimeoutError, TimeoutError)):
+            return "Timeout"
+        if isinstance(error, _RETRYABLE_ERRORS):
+            return "Transient API error"
+        return "Error"
+    
+    @staticmethod
+    def _jitter_temperature(temperature, attempt):
+        """Nudge the sampling temperature on regenerations so a retry doesn't repeat the same take"""
+        if attempt == 0:
+            return temperature
+        return min(1.0, max(0.1, temperature + random.uniform(-0.1, 0.1)))
+    
+    def _get_reference_digest(self, reference_audio):
+        """Content hash of the reference audio (identifies the cloned voice across runs)"""
+        key = (reference_audio, os.stat(reference_audio).st_mtime_ns)
+        digest = self._ref_digests.get(key)
+        if digest is None:
+            digest = hashlib.blake2b(self._get_reference_b64(reference_audio).encode("ascii"), digest_size=16).hexdigest()
+            self._ref_digests[key] = digest
+        return digest
     
-    def _assemble_audio_timeline(self, audio_segments, total_duration, output_path):
-        """Assemble final audio based on timeline alignment"""
+    def _abort_after(self, target_duration, attempt, max_retries):
+        """Length at which a streamed attempt is cancelled as too long (None on the last attempt)"""
+        if attempt >= max_retries - 1:
+            return None
+        if target_duration is not None and target_duration > 0:
+            return min(30, target_duration * 2.2)
+        return 30
+    
+    def _stream_audio(self, output_path, max_seconds=None, **kwargs):
+        """
+        Stream a TTS completion and decode it straight into a WAV file
+        
+        Args:
+            output_path: WAV file to write
+            max_seconds: Cancel the stream once this much audio has arrived
+        
+        Returns:
+            float: Duration of the written audio in seconds (0.0 if none arrived)
+        """
+        modalities = self._modalities
         try:
-            # Sort segments by start time
-            audio_segments = sorted(audio_segments, key=lambda x: x[0])
-            
-            # Create full-length empty audio buffer
-            total_samples = int(total_duration * self.SAMPLE_RATE)
-            audio_data = bytearray(b'\x00\x00' * total_samples)
-            
-            # Insert each audio segment at proper position
-            for i, (start_time, audio_file) in enumerate(audio_segments, 1):
-                if not os.path.exists(audio_file):
+            response = self.client.chat.completions.create(stream=True, modalities=modalities, **kwargs)
+        except openai.BadRequestError:
+            if modalities != ["audio"]:
+                raise
+            print("    ℹ️  Audio-only output not supported, requesting text + audio")
+            self._modalities = ["text", "audio"]
+            response = self.client.chat.completions.create(stream=True, modalities=self._modalities, **kwargs)
+        writer = _WavStreamWriter(output_path, self.SAMPLE_RATE, self.CHANNELS, self.SAMPLE_WIDTH)
+        try:
+            for chunk in response:
+                if not chunk.choices:
                     continue
-                
-                try:
-                    with wave.open(audio_file, 'rb') as wav:
-                        if wav.getnchannels() != self.CHANNELS or wav.getframerate() != self.SAMPLE_RATE:
-                            continue
-                        
-                        frames = wav.readframes(wav.getnframes())
-                    
-                    # Calculate insertion point
-                    start_sample = int(start_time * self.SAMPLE_RATE)
-                    start_byte = start_sample * self.SAMPLE_WIDTH
-                    end_byte = start_byte + len(frames)
-                    
-                    if end_byte > len(audio_data):
-                        frames = frames[:len(audio_data) - start_byte]
-                        end_byte = len(audio_data)
-                    
-                    audio_data[start_byte:end_byte] = frames
-                    
-                except:
+                audio = getattr(chunk.choices[0].delta, "audio", None)
+                data = audio.get("data") if isinstance(audio, dict) else getattr(audio, "data", None)
+                if not data:
                     continue
-            
-            # Write final assembled file
-            with wave.open(output_path, 'wb') as wav:
-                wav.setnchannels(self.CHANNELS)
-                wav.setsampwidth(self.SAMPLE_WIDTH)
-                wav.setframerate(self.SAMPLE_RATE)
-                wav.writeframes(bytes(audio_data))
-            
-            return True
-        
-        except:
-            return False
+                writer.feed_b64(data)
+                if max_seconds and writer.duration > max_seconds:
+                    # Already unusable: stop paying for server-side generation
+                    response.close()
+                    break
+        finally:
+            writer.close()
+        return writer.duration
     
     def _get_audio_duration(self, audio_path):
         """Get duration of an audio file"""
+        # PCM WAVs (everything this module writes): read the header, no ffprobe fork
+        try:
+            st = os.stat(audio_path)
+            return _wav_duration(audio_path, st.st_mtime_ns, st.st_size)
+        except (OSError, wave.Error, EOFError, ZeroDivisionError):
+            pass
+        
         try:
             result = subprocess.run(
                 ["ffprobe", "-v", "error", "-show_entries", "format=duration",
@@ -814,17 +1442,21 @@ class TTSGenerator:
         except:
             return 0.0
     
-    def _convert_to_mp3(self, input_wav, output_mp3, bitrate="192k"):
-        """Convert WAV file to MP3"""
+    def _convert_to_mp3(self, samples, output_mp3, bitrate="192k"):
+        """Encode int16 samples to MP3, piping raw PCM into ffmpeg (no WAV intermediate)"""
         try:
             cmd = [
                 "ffmpeg", "-y",
-                "-i", input_wav,
+                "-f", "s16le",
+                "-ar", str(self.SAMPLE_RATE),
+                "-ac", str(self.CHANNELS),
+                "-i", "pipe:0",
                 "-acodec", "libmp3lame",
                 "-ab", bitrate,
                 output_mp3
             ]
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            subprocess.run(cmd, input=memoryview(samples).cast("B"), check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             return True
         except:
             return False
\ No newline at end of file
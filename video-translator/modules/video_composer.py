@@ -10,57 +10,85 @@ Features:
    - Yellow bottom style
    - Blurred bar style (recommended)
 6. Adaptive subtitle sizing
+7. Soft subtitle track (mov_text) without re-encoding
 """
 
 import os
+import re
 import json
+import shutil
 import subprocess
+from collections import deque
 from pathlib import Path
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Escapes a subtitle path for use inside an ffmpeg filter argument
+_SUBTITLE_PATH_ESCAPE = str.maketrans({'\\': '/', ':': '\\:'})
+
+
+def _load_json(path):
+    """Read a JSON file (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 
 class VideoComposer:
     """Video Composer - Enhanced Version"""
     
-    # Subtitle style presets (support adaptive scaling)
+    # Subtitle style presets (sizes in 1080p pixels, scaled by libass to the frame height).
+    # Values match what was on screen when ffmpeg rendered the SRT at PlayResY 288:
+    # the default size 60 px is libass's old 16 (x3.75), outline/shadow/margin are x3.75
     SUBTITLE_STYLES = {
         "default": {
             "name": "Default Style",
             "description": "Simple white subtitles with black outline, auto-scaled size",
-            "base_font_size": 24,  # Base font size (for 1080p)
+            "base_font_size": 60,  # Base font size (for 1080p)
             "force_style_template": (
                 "FontName=Arial,"
+                "FontSize={font_size},"
                 "PrimaryColour=&HFFFFFF&,"
                 "OutlineColour=&H000000&,"
-                "Outline=2,"
-                "Shadow=1,"
-                "MarginV=30"
+                "Outline=7.5,"
+                "Shadow=3.75,"
+                "MarginV=112"
             )
         },
         "yellow_bottom": {
             "name": "Yellow Bottom",
             "description": "Yellow subtitles, bottom centered, black outline, adaptive size",
-            "base_font_size": 20,  # Base font size (for 1080p)
+            "base_font_size": 50,  # Base font size (for 1080p)
             "force_style_template": (
                 "FontName=Arial,"
+                "FontSize={font_size},"
                 "PrimaryColour=&H00FFFF&,"
                 "OutlineColour=&H000000&,"
-                "Outline=2,"
-                "Shadow=1,"
-                "MarginV=30"
+                "Outline=7.5,"
+                "Shadow=3.75,"
+                "MarginV=112"
             )
         },
         "blurred_bar": {
             "name": "Blurred Bar (Recommended)",
             "description": "Soft blurred background bar + white subtitles with black edges, adaptive size",
-            "base_font_size": 26,  # Base font size (for 1080p)
+            "base_font_size": 65,  # Base font size (for 1080p)
             "force_style_template": (
                 "FontName=Arial,"
+                "FontSize={font_size},"
                 "PrimaryColour=&HFFFFFF&,"
                 "BackColour=&H00000000&,"
                 "OutlineColour=&H00000000&,"
                 "BorderStyle=1,"
-                "Outline=2,"
+                "Outline=7.5,"
                 "Shadow=0,"
                 "Alignment=2"
             ),
@@ -68,79 +96,255 @@ class VideoComposer:
         }
     }
     
+    # Vertical resolution the subtitle styles are authored for
+    PLAY_RES_Y = 1080
+    
+    # ASS [V4+ Styles] fields for the burned-in script (force_style values override these)
+    ASS_DEFAULT_STYLE = {
+        "Name": "Default", "Fontname": "Arial", "Fontsize": "60",
+        "PrimaryColour": "&H00FFFFFF", "SecondaryColour": "&H000000FF",
+        "OutlineColour": "&H00000000", "BackColour": "&H00000000",
+        "Bold": "0", "Italic": "0", "Underline": "0", "StrikeOut": "0",
+        "ScaleX": "100", "ScaleY": "100", "Spacing": "0", "Angle": "0",
+        "BorderStyle": "1", "Outline": "3.75", "Shadow": "0", "Alignment": "2",
+        "MarginL": "38", "MarginR": "38", "MarginV": "38", "Encoding": "1"
+    }
+    
+    # Audio codecs the MP4 muxer takes as-is (stream copy instead of AAC re-encode)
+    MP4_COPY_AUDIO_CODECS = ("aac", "mp3")
+    
+    # Hardware H.264 encoders in preference order (software frames in, no hw filters needed)
+    HW_VIDEO_ENCODERS = ["h264_nvenc", "h264_qsv", "h264_videotoolbox"]
+    
+    # stderr markers of a hardware encoder/device that cannot be initialized
+    # ("*" applies to every hardware encoder)
+    ENCODER_INIT_ERRORS = {
+        "*": ("Error while opening encoder", "Cannot load", "init failed"),
+        "h264_nvenc": ("No NVENC capable devices", "OpenEncodeSessionEx failed", "No capable devices found"),
+        "h264_qsv": ("Error initializing an internal MFX session", "Error creating a MFX session",
+                     "Failed to create a VAAPI device", "Device creation failed"),
+        "h264_videotoolbox": ("cannot create compression session", "Error creating compression session"),
+    }
+    
+    # Encoder picked by the first _check_ffmpeg() in this process
+    _detected_encoder = None
+    
     def __init__(self):
         """Initialize the video composer"""
-        self._check_ffmpeg()
+        self.video_encoder = self._check_ffmpeg()
+        self._probe_cache = {}
+        self.ffmpeg_threads = None  # None = let ffmpeg decide (set per job by compose_batch)
     
     def _check_ffmpeg(self):
-        """Check if ffmpeg is available"""
+        """
+        Check if ffmpeg is available and pick the H.264 encoder for re-encoding passes
+        The result is cached on the class, so only the first composer in a process
+        spawns ffmpeg for this
+        
+        Returns: Encoder name (first available hardware encoder, else libx264)
+        """
+        if VideoComposer._detected_encoder:
+            return VideoComposer._detected_encoder
+        
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("❌ ffmpeg is not installed or not available")
+        
         try:
-            subprocess.run(
-                ["ffmpeg", "-version"], 
+            result = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-encoders"], 
                 capture_output=True,
+                text=True,
                 check=True
             )
         except:
             raise RuntimeError("❌ ffmpeg is not installed or not available")
+        
+        available = set(line.split()[1] for line in result.stdout.splitlines() if len(line.split()) > 1)
+        VideoComposer._detected_encoder = "libx264"
+        for encoder in self.HW_VIDEO_ENCODERS:
+            if encoder in available:
+                print(f"🚀 Hardware video encoder: {encoder}")
+                VideoComposer._detected_encoder = encoder
+                break
+        return VideoComposer._detected_encoder
     
-    def _calculate_font_size(self, video_width, video_height, base_font_size=24):
+    def _video_codec_args(self, encoder):
         """
-        Calculate adaptive font size based on video resolution
-        
-        Args:
-            video_width: Video width
-            video_height: Video height
-            base_font_size: Base font size (for 1080p)
-        
-        Returns:
-            int: Calculated font size
+        ffmpeg output args for the given H.264 encoder
+        Hardware encoders run in constant-quality mode roughly matching libx264's
+        default CRF 23, so size and quality follow the source rather than the GPU
         """
-        base_width = 1920
-        base_height = 1080
-        
-        base_diagonal = (base_width ** 2 + base_height ** 2) ** 0.5
-        current_diagonal = (video_width ** 2 + video_height ** 2) ** 0.5
-        
-        scale_factor = current_diagonal / base_diagonal
-        
-        font_size = max(16, min(48, int(base_font_size * scale_factor)))
+        if encoder == "h264_nvenc":
+            return ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0"]
+        if encoder == "h264_qsv":
+            return ["-c:v", "h264_qsv", "-preset", "medium", "-global_quality", "23"]
+        if encoder == "h264_videotoolbox":
+            return ["-c:v", "h264_videotoolbox", "-q:v", "60"]
+        return ["-c:v", "libx264"]
+    
+    def _run_ffmpeg(self, cmd, tail_lines=20):
+        """
+        Run an ffmpeg command keeping only the tail of its stderr
+        ffmpeg logs progress to stderr for the whole encode, so capture_output would
+        buffer all of it in memory just to print the last few hundred bytes on failure
         
-        print(f"📏 Resolution: {video_width}x{video_height}, Computed Font Size: {font_size}px")
-        return font_size
+        Returns: subprocess.CompletedProcess (stderr = last tail_lines lines)
+        """
+        # No banner or progress lines, so the tail holds the actual error messages
+        cmd = [cmd[0], "-hide_banner", "-nostats"] + cmd[1:]
+        
+        tail = deque(maxlen=tail_lines)
+        with subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                              text=True, errors="replace") as proc:
+            for line in proc.stderr:
+                tail.append(line)
+        return subprocess.CompletedProcess(cmd, proc.returncode, None, "".join(tail))
+    
+    def _hw_encoder_unusable(self, encoder, stderr):
+        """Whether an ffmpeg failure was the encoder/device failing to initialize"""
+        markers = self.ENCODER_INIT_ERRORS.get("*", ()) + self.ENCODER_INIT_ERRORS.get(encoder, ())
+        return any(marker in stderr for marker in markers)
     
-    def _get_adaptive_style(self, video_path, style_name):
+    def _run_encode(self, cmd):
         """
-        Get adaptive subtitle style
+        Run a re-encoding compose command
+        A hardware encoder can be listed but unusable (no GPU/driver): when the failure
+        is the encoder failing to initialize, retry once with libx264 and keep using
+        libx264 for the rest of the process. Any other failure (bad input, subtitle
+        path, filter) is returned as is
+        """
+        result = self._run_ffmpeg(cmd)
+        
+        if (result.returncode != 0 and self.video_encoder != "libx264"
+                and self._hw_encoder_unusable(self.video_encoder, result.stderr or "")):
+            print(f"⚠️  {self.video_encoder} failed, falling back to libx264")
+            hw_args = self._video_codec_args(self.video_encoder)
+            i = cmd.index("-c:v")
+            cmd = cmd[:i] + self._video_codec_args("libx264") + cmd[i + len(hw_args):]
+            self.video_encoder = VideoComposer._detected_encoder = "libx264"
+            result = self._run_ffmpeg(cmd)
+        
+        return result
+    
+    def _get_style(self, style_name):
+        """
+        Get subtitle style
+        Font sizes are 1080p pixel sizes; libass scales them to the actual frame
+        height through the ASS script's PlayResY (see _srt_to_ass)
         
         Args:
-            video_path: Path to video file
             style_name: Style name
         
         Returns:
-            dict: Style configuration with adaptive font size
+            dict: Style configuration with font size applied
         """
         style_config = self.SUBTITLE_STYLES.get(style_name, self.SUBTITLE_STYLES["default"])
         
-        video_info = self.get_video_info(video_path)
-        video_width = video_info.get("width", 1920)
-        video_height = video_info.get("height", 1080)
-        
-        base_font_size = style_config.get("base_font_size", 24)
-        adaptive_font_size = self._calculate_font_size(video_width, video_height, base_font_size)
-        
+        font_size = style_config.get("base_font_size", 60)
         template = style_config.get("force_style_template", "")
-        force_style = template.replace("FontSize={}", f"FontSize={adaptive_font_size}")
+        force_style = template.format(font_size=font_size)
         
         return {
             "name": style_config["name"],
             "description": style_config["description"],
             "force_style": force_style,
-            "font_size": adaptive_font_size,
+            "font_size": font_size,
             "requires_filter": style_config.get("requires_filter", False)
         }
     
+    def _play_res_x(self, video_info):
+        """Script width matching the frame's aspect ratio at PLAY_RES_Y"""
+        width = video_info.get("width") or 1920
+        height = video_info.get("height") or 1080
+        return max(1, round(self.PLAY_RES_Y * width / height))
+    
+    def _srt_to_ass(self, srt_path, video_info, force_style=""):
+        """
+        Convert an SRT file to an ASS script authored at 1080p
+        ffmpeg reads a bare SRT at PlayResY 288, which would treat the 1080p font sizes
+        as ~4x too large; with PlayResY 1080 libass scales text, outline and margins
+        to the real frame height, so no per-video font math is needed
+        
+        Args:
+            srt_path: SRT file path
+            video_info: get_video_info() result (for the frame aspect ratio)
+            force_style: Style overrides (Key=Value,...) baked into the script's Default style
+        
+        Returns:
+            str: Path to the .ass file (None on failure)
+        """
+        try:
+            play_res_x = self._play_res_x(video_info)
+            
+            style = dict(self.ASS_DEFAULT_STYLE)
+            field_names = {name.lower(): name for name in style}
+            for item in force_style.split(','):
+                key, _, value = item.partition('=')
+                if key.strip().lower() in field_names and value:
+                    style[field_names[key.strip().lower()]] = value.strip()
+            
+            with open(srt_path, 'r', encoding='utf-8-sig') as f:
+                blocks = f.read().replace('\r\n', '\n').strip().split('\n\n')
+            
+            events = []
+            for block in blocks:
+                lines = block.split('\n')
+                if len(lines) < 3 or '-->' not in lines[1]:
+                    continue
+                start, end = (self._srt_time_to_ass(t) for t in lines[1].split('-->'))
+                text = '\\N'.join(self._srt_text_to_ass(line.strip()) for line in lines[2:])
+                events.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n")
+            
+            header = (
+                "[Script Info]\n"
+                "ScriptType: v4.00+\n"
+                f"PlayResX: {play_res_x}\n"
+                f"PlayResY: {self.PLAY_RES_Y}\n"
+                "ScaledBorderAndShadow: yes\n"
+                "\n"
+                "[V4+ Styles]\n"
+                f"Format: {', '.join(style)}\n"
+                f"Style: {','.join(style.values())}\n"
+                "\n"
+                "[Events]\n"
+                "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+            )
+            
+            ass_path = str(Path(srt_path).with_suffix('.ass'))
+            with open(ass_path, 'w', encoding='utf-8') as f:
+                f.write(header + "".join(events))
+            
+            return ass_path
+        
+        except Exception as e:
+            print(f"⚠️  ASS conversion failed, burning the SRT directly: {e}")
+            return None
+    
+    def _srt_text_to_ass(self, line):
+        """
+        Convert one SRT text line to ASS event text
+        Mirrors ffmpeg's SRT decoder (what the subtitles= path did): literal {, } and
+        \\ are escaped so libass does not read them as override tags, and the basic
+        <i>/<b>/<u> tags become their ASS equivalents instead of printing literally
+        (<font> tags are dropped; the burned style sets the colour)
+        """
+        line = re.sub(r'([{}\\])', r'\\\1', line)
+        line = re.sub(r'</?font[^>]*>', '', line, flags=re.IGNORECASE)
+        return re.sub(r'<(/?)([ibu])>', lambda m: '{\\%s%s}' % (m.group(2).lower(), '0' if m.group(1) else '1'),
+                      line, flags=re.IGNORECASE)
+    
+    def _srt_time_to_ass(self, timestamp):
+        """Convert an SRT timestamp (00:00:00,000) to ASS (0:00:00.00)"""
+        hms, ms = timestamp.strip().split(',')
+        h, m, s = (int(x) for x in hms.split(':'))
+        cs = ((h * 3600 + m * 60 + s) * 1000 + int(ms) + 5) // 10
+        h, cs = divmod(cs, 360000)
+        m, cs = divmod(cs, 6000)
+        s, cs = divmod(cs, 100)
+        return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+    
     def compose(self, video_path, audio_path, output_path, 
-                subtitle_path=None, subtitle_style="default", keep_original_audio=False):
+                subtitle_path=None, subtitle_style="default", keep_original_audio=False, burn_in=True):
         """
         Compose the final video
         
@@ -151,6 +355,8 @@ class VideoComposer:
             subtitle_path: Subtitle file path (optional)
             subtitle_style: Subtitle style ("default", "yellow_bottom", "blurred_bar")
             keep_original_audio: Whether to keep and mix original audio
+            burn_in: Burn subtitles into the picture; False adds them as a soft
+                     (mov_text) track instead, so the video is stream-copied
         
         Returns:
             bool: Success status
@@ -171,23 +377,40 @@ class VideoComposer:
             video_info = self.get_video_info(video_path)
             print(f"📊 Video Info: {video_info['width']}x{video_info['height']}, {video_info['fps']:.2f}fps, {video_info['duration']:.1f}s")
             
-            aligned_audio = self._align_audio_to_video(video_path, audio_path, output_path)
-            if not aligned_audio:
-                print("⚠️  Audio alignment failed, using original audio")
-                aligned_audio = audio_path
+            # The new audio is padded/trimmed to the video length inside the compose
+            # filter graph, not in a separate ffmpeg run writing aligned_audio.wav
+            duration = self._aligned_duration(video_info["duration"], self._get_duration(audio_path))
+            
+            if keep_original_audio and not self._has_audio(video_path):
+                print("ℹ️  Original video has no audio track, skipping the mix")
+                keep_original_audio = False
             
-            if subtitle_path and os.path.exists(subtitle_path):
-                adaptive_style = self._get_adaptive_style(video_path, subtitle_style)
-                print(f"📝 Subtitle Style: {adaptive_style['name']} (Font Size: {adaptive_style['font_size']}px)")
+            if subtitle_path and os.path.exists(subtitle_path) and not burn_in:
+                print("📝 Soft subtitle mode (mov_text track, no video re-encode)")
+                return self._compose_without_subtitles(
+                    video_path, audio_path, output_path, keep_original_audio, duration,
+                    soft_subtitle_path=subtitle_path
+                )
+            elif subtitle_path and os.path.exists(subtitle_path):
+                style = self._get_style(subtitle_style)
+                print(f"📝 Subtitle Style: {style['name']} (Font Size: {style['font_size']}px @1080p)")
+                
+                burn_path = self._srt_to_ass(subtitle_path, video_info, style["force_style"])
+                if burn_path is None:
+                    # subtitles= would lay the 1080p sizes out at the SRT default PlayResY
+                    # of 288; libass honours PlayResX/PlayResY in force_style
+                    burn_path = subtitle_path
+                    play_res = f"PlayResX={self._play_res_x(video_info)},PlayResY={self.PLAY_RES_Y}"
+                    style = dict(style, force_style=f"{play_res},{style['force_style']}")
                 
                 return self._compose_with_subtitles(
-                    video_path, aligned_audio, output_path,
-                    subtitle_path, adaptive_style, keep_original_audio
+                    video_path, audio_path, output_path,
+                    burn_path, style, keep_original_audio, duration
                 )
             else:
                 print("📝 No subtitle mode")
                 return self._compose_without_subtitles(
-                    video_path, aligned_audio, output_path, keep_original_audio
+                    video_path, audio_path, output_path, keep_original_audio, duration
                 )
         
         except Exception as e:
@@ -196,55 +419,132 @@ class VideoComposer:
             traceback.print_exc()
             return False
     
-    def _align_audio_to_video(self, video_path, audio_path, output_path):
+    def compose_batch(self, jobs, max_workers=None, threads_per_job=2):
         """
-        Automatically align audio and video durations
-        Returns: Path to aligned audio
+        Compose several videos with concurrent ffmpeg processes
+        
+        Args:
+            jobs: Iterable of compose() keyword-argument dicts
+            max_workers: Number of videos composed at once (default: half the CPU count)
+            threads_per_job: ffmpeg -threads per job, so the jobs together fit the machine
+        
+        Returns:
+            list: One success flag per job, in input order
         """
+        jobs = list(jobs)
+        max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        
+        # The work happens in the ffmpeg child processes, so threads only wait on them
+        previous_threads = self.ffmpeg_threads
+        self.ffmpeg_threads = threads_per_job
         try:
-            video_dur = self._get_duration(video_path)
-            audio_dur = self._get_duration(audio_path)
-            
-            print(f"📊 Video Duration: {video_dur:.1f}s")
-            print(f"📊 Audio Duration: {audio_dur:.1f}s")
-            
-            if abs(video_dur - audio_dur) <= 0.5:
-                print("✅ Durations already aligned, no adjustment needed")
-                return audio_path
-            
-            aligned_audio = str(Path(output_path).parent / "aligned_audio.wav")
-            shorter = min(video_dur, audio_dur)
-            
-            print(f"⚙️  Aligning audio length → {shorter:.1f}s")
-            
-            subprocess.run([
-                "ffmpeg", "-y",
-                "-i", audio_path,
-                "-t", str(shorter),
-                "-c", "copy",
-                aligned_audio
-            ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-            
-            print("✅ Audio alignment complete")
-            return aligned_audio
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(lambda job: self.compose(**job), jobs))
+        finally:
+            self.ffmpeg_threads = previous_threads
+    
+    def _soft_subtitle_input_args(self, soft_subtitle_path):
+        """Input args for a soft subtitle file (becomes input 2)"""
+        return ["-i", soft_subtitle_path] if soft_subtitle_path else []
+    
+    def _soft_subtitle_output_args(self, soft_subtitle_path):
+        """Map input 2 as an MP4 text track (mov_text)"""
+        if not soft_subtitle_path:
+            return []
+        return ["-map", "2:s:0", "-c:s", "mov_text"]
+    
+    def _output_args(self, length=None):
+        """
+        Trailing output options shared by every compose command
+        With a soft subtitle track the output is cut at the video length (-t) instead
+        of -shortest, which would end it at the last subtitle cue
+        """
+        args = ["-t", f"{length:.3f}"] if length else ["-shortest"]
+        if self.ffmpeg_threads:
+            args.extend(["-threads", str(self.ffmpeg_threads)])
+        
+        # Filter graphs (blur, subtitle raster, amix) otherwise run on few threads while the
+        # encoder takes the rest; within a batch, stay inside the per-job thread budget
+        filter_threads = self.ffmpeg_threads or max(2, (os.cpu_count() or 4) // 2)
+        args.extend(["-filter_complex_threads", str(filter_threads)])
+        return args
+    
+    def _aligned_duration(self, video_dur, audio_dur):
+        """
+        Target length for the new audio
+        Returns: Video duration to pad/trim the audio to (None = already aligned)
+        """
+        print(f"📊 Video Duration: {video_dur:.1f}s")
+        print(f"📊 Audio Duration: {audio_dur:.1f}s")
         
-        except:
+        if video_dur <= 0 or audio_dur <= 0 or abs(video_dur - audio_dur) <= 0.5:
+            print("✅ Durations already aligned, no adjustment needed")
             return None
+        
+        print(f"⚙️  Aligning audio length → {video_dur:.1f}s")
+        return video_dur
+    
+    def _new_audio_filter(self, duration):
+        """
+        Filter chain for the new audio (input 1), output label [anew]
+        Pads with silence when it is shorter than the video and trims when it is longer,
+        so the video keeps its full length either way
+        """
+        if not duration:
+            return "[1:a]anull[anew]"
+        return f"[1:a]apad=whole_dur={duration:.3f},atrim=0:{duration:.3f}[anew]"
+    
+    def _probe(self, file_path):
+        """
+        Probe a media file once (format duration + stream codec/geometry/frame rate)
+        Returns: ffprobe JSON dict ({} on failure), memoized per file
+        """
+        try:
+            key = (os.path.abspath(file_path), os.path.getmtime(file_path))
+        except OSError:
+            return {}
+        
+        if key not in self._probe_cache:
+            data = {}
+            try:
+                result = subprocess.run(
+                    ["ffprobe", "-v", "error",
+                     "-show_entries", "format=duration:stream=codec_type,codec_name,width,height,r_frame_rate",
+                     "-of", "json", file_path],
+                    capture_output=True, text=True
+                )
+                if result.returncode == 0:
+                    data = json.loads(result.stdout)
+            except Exception:
+                pass
+            self._probe_cache[key] = data
+        
+        return self._probe_cache[key]
+    
+    def _has_audio(self, file_path):
+        """Whether the file has an audio stream"""
+        return any(stream.get("codec_type") == "audio" for stream in self._probe(file_path).get("streams", []))
+    
+    def _get_audio_codec(self, file_path):
+        """Codec name of the first audio stream ("" if unknown)"""
+        for stream in self._probe(file_path).get("streams", []):
+            if stream.get("codec_type") == "audio":
+                return stream.get("codec_name", "")
+        return ""
     
     def _get_duration(self, file_path):
         """Get media file duration"""
         try:
-            result = subprocess.run(
-                ["ffprobe", "-v", "error", "-show_entries", "format=duration",
-                 "-of", "default=noprint_wrappers=1:nokey=1", file_path],
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-            )
-            return float(result.stdout.strip())
+            return float(self._probe(file_path)["format"]["duration"])
         except:
             return 0.0
     
-    def _compose_without_subtitles(self, video_path, audio_path, output_path, keep_original_audio):
-        """Compose video (no subtitles)"""
+    def _compose_without_subtitles(self, video_path, audio_path, output_path, keep_original_audio,
+                                   duration=None, soft_subtitle_path=None):
+        """Compose video (no burned-in subtitles; optional soft subtitle track)"""
+        if self._can_copy_new_audio(audio_path, keep_original_audio, duration):
+            return self._remux(video_path, audio_path, output_path, soft_subtitle_path)
+        
         print("\n🔄 Merging video and audio...")
         
         cmd = [
@@ -252,28 +552,81 @@ class VideoComposer:
             "-i", video_path,
             "-i", audio_path
         ]
+        cmd.extend(self._soft_subtitle_input_args(soft_subtitle_path))
+        
+        audio_filter = self._new_audio_filter(duration)
         
         if keep_original_audio:
             cmd.extend([
-                "-filter_complex", "[0:a][1:a]amix=inputs=2:duration=shortest[aout]",
+                "-filter_complex", f"{audio_filter};[0:a][anew]amix=inputs=2:duration=shortest[aout]",
                 "-map", "0:v:0",
                 "-map", "[aout]"
             ])
         else:
             cmd.extend([
+                "-filter_complex", audio_filter,
                 "-map", "0:v:0",
-                "-map", "1:a:0"
+                "-map", "[anew]"
             ])
         
         cmd.extend([
             "-c:v", "copy",
             "-c:a", "aac",
-            "-b:a", "192k",
-            "-shortest",
-            output_path
+            "-b:a", "192k"
         ])
+        cmd.extend(self._soft_subtitle_output_args(soft_subtitle_path))
+        cmd.extend(self._output_args(self._get_duration(video_path) if soft_subtitle_path else None))
+        cmd.append(output_path)
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self._run_ffmpeg(cmd)
+        
+        if result.returncode == 0 and os.path.exists(output_path):
+            print(f"✅ Video saved: {output_path}")
+            print("=" * 80)
+            return True
+        else:
+            print(f"❌ Composition failed")
+            if result.stderr:
+                print(f"   Error info: {result.stderr[-300:]}")
+            return False
+    
+    def _can_copy_new_audio(self, audio_path, keep_original_audio, duration):
+        """
+        Whether the new audio can be stream-copied instead of filtered and re-encoded to AAC
+        True when nothing is mixed in, the codec fits MP4 and no silence has to be padded
+        (a track longer than the video is cut at the video's end by -shortest)
+        """
+        if keep_original_audio or self._get_audio_codec(audio_path) not in self.MP4_COPY_AUDIO_CODECS:
+            return False
+        return not duration or self._get_duration(audio_path) >= duration
+    
+    def _remux(self, video_path, audio_path, output_path, soft_subtitle_path=None):
+        """
+        Compose by stream copy only (nothing to filter or re-encode)
+        Used when there are no burned-in subtitles, no mix, and no silence to pad
+        """
+        print("\n🔄 Remuxing video and audio (stream copy)...")
+        
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", video_path,
+            "-i", audio_path
+        ]
+        cmd.extend(self._soft_subtitle_input_args(soft_subtitle_path))
+        cmd.extend([
+            "-map", "0:v:0",
+            "-map", "1:a:0",
+            "-c", "copy",
+            "-movflags", "+faststart"
+        ])
+        cmd.extend(self._soft_subtitle_output_args(soft_subtitle_path))
+        if soft_subtitle_path and self._get_duration(video_path) > 0:
+            cmd.extend(["-t", f"{self._get_duration(video_path):.3f}"])
+        elif not soft_subtitle_path:
+            cmd.append("-shortest")
+        cmd.append(output_path)
+        
+        result = self._run_ffmpeg(cmd)
         
         if result.returncode == 0 and os.path.exists(output_path):
             print(f"✅ Video saved: {output_path}")
@@ -286,29 +639,40 @@ class VideoComposer:
             return False
     
     def _compose_with_subtitles(self, video_path, audio_path, output_path, 
-                                 subtitle_path, style_config, keep_original_audio):
+                                 subtitle_path, style_config, keep_original_audio, duration=None):
         """Compose video (with subtitles)"""
         
         if style_config.get("requires_filter", False):
             return self._compose_with_blurred_subtitles(
                 video_path, audio_path, output_path, 
-                subtitle_path, style_config, keep_original_audio
+                subtitle_path, style_config, keep_original_audio, duration
             )
         else:
             return self._compose_with_simple_subtitles(
                 video_path, audio_path, output_path, 
-                subtitle_path, style_config, keep_original_audio
+                subtitle_path, style_config, keep_original_audio, duration
             )
     
+    def _subtitle_filter(self, subtitle_path, style_config):
+        """
+        Subtitle burn-in filter for the given file
+        An ASS script from _srt_to_ass already carries the style, so it goes straight to
+        libass via ass=; a plain SRT needs subtitles= (converted by ffmpeg) plus force_style
+        """
+        subtitle_path_escaped = subtitle_path.translate(_SUBTITLE_PATH_ESCAPE)
+        
+        if subtitle_path.lower().endswith(".ass"):
+            return f"ass='{subtitle_path_escaped}'"
+        
+        force_style = style_config.get("force_style", "")
+        return f"subtitles='{subtitle_path_escaped}':force_style='{force_style}'"
+    
     def _compose_with_simple_subtitles(self, video_path, audio_path, output_path, 
-                                        subtitle_path, style_config, keep_original_audio):
+                                        subtitle_path, style_config, keep_original_audio, duration=None):
         """Compose video (simple subtitle style)"""
         print("\n🔄 Merging video, audio, and subtitles...")
         
-        subtitle_path_escaped = subtitle_path.replace('\\', '/').replace(':', '\\:')
-        
-        force_style = style_config.get("force_style", "")
-        subtitles_filter = f"subtitles={subtitle_path_escaped}:force_style='{force_style}'"
+        subtitles_filter = self._subtitle_filter(subtitle_path, style_config)
         
         cmd = [
             "ffmpeg", "-y",
@@ -316,28 +680,36 @@ class VideoComposer:
             "-i", audio_path
         ]
         
+        audio_filter = self._new_audio_filter(duration)
+        audio_args = ["-c:a", "aac", "-b:a", "192k"]
+        
         if keep_original_audio:
             cmd.extend([
                 "-filter_complex", 
-                f"[0:a][1:a]amix=inputs=2:duration=shortest[aout];[0:v]{subtitles_filter}[vout]",
+                f"{audio_filter};[0:a][anew]amix=inputs=2:duration=shortest[aout];[0:v]{subtitles_filter}[vout]",
                 "-map", "[vout]",
                 "-map", "[aout]"
             ])
+        elif self._can_copy_new_audio(audio_path, keep_original_audio, duration):
+            cmd.extend([
+                "-filter_complex", f"[0:v]{subtitles_filter}[vout]",
+                "-map", "[vout]",
+                "-map", "1:a:0"
+            ])
+            audio_args = ["-c:a", "copy"]
         else:
             cmd.extend([
-                "-vf", subtitles_filter,
-                "-map", "0:v",
-                "-map", "1:a"
+                "-filter_complex", f"[0:v]{subtitles_filter}[vout];{audio_filter}",
+                "-map", "[vout]",
+                "-map", "[anew]"
             ])
         
-        cmd.extend([
-            "-c:a", "aac",
-            "-b:a", "192k",
-            "-shortest",
-            output_path
-        ])
+        cmd.extend(self._video_codec_args(self.video_encoder))
+        cmd.extend(audio_args)
+        cmd.extend(self._output_args())
+        cmd.append(output_path)
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self._run_encode(cmd)
         
         if result.returncode == 0 and os.path.exists(output_path):
             print(f"✅ Video saved: {output_path}")
@@ -350,7 +722,7 @@ class VideoComposer:
             return False
     
     def _compose_with_blurred_subtitles(self, video_path, audio_path, output_path, 
-                                         subtitle_path, style_config, keep_original_audio):
+                                         subtitle_path, style_config, keep_original_audio, duration=None):
         """
         Compose video (blurred bar subtitle style)
         Creates a soft blurred bar background, then overlays clear white text
@@ -358,14 +730,17 @@ class VideoComposer:
         print("\n🔄 Merging video, audio, and blurred-bar subtitles...")
         print("   Tip: This style looks best but takes slightly longer to render")
         
-        subtitle_path_escaped = subtitle_path.replace('\\', '/').replace(':', '\\:')
-        force_style = style_config.get("force_style", "")
+        subtitles_filter = self._subtitle_filter(subtitle_path, style_config)
         
         vf_filter = (
             "[0:v]split[v][vblur];"
-            "[vblur]crop=iw:ih*0.25:0:ih*0.75,boxblur=20:1,format=rgba,colorchannelmixer=aa=0.7[blurred];"
+            "[vblur]crop=iw:ih*0.25:0:ih*0.75,"
+            # Blur at quarter resolution (1/16 of the pixels), then scale back up; ceil keeps
+            # the upscaled strip at least as large as the crop (overflow is clipped by overlay)
+            "scale=ceil(iw/4):ceil(ih/4):flags=area,gblur=sigma=3:steps=2,scale=iw*4:ih*4:flags=bilinear,"
+            "format=rgba,colorchannelmixer=aa=0.7[blurred];"
             "[v][blurred]overlay=0:H-h*0.25,"
-            f"subtitles='{subtitle_path_escaped}':force_style='{force_style}'"
+            f"{subtitles_filter}"
         )
         
         cmd = [
@@ -374,28 +749,37 @@ class VideoComposer:
             "-i", audio_path
         ]
         
+        audio_filter = self._new_audio_filter(duration)
+        audio_args = ["-c:a", "aac", "-b:a", "192k"]
+        
         if keep_original_audio:
             cmd.extend([
                 "-filter_complex", 
-                f"{vf_filter}[vout];[0:a][1:a]amix=inputs=2:duration=shortest[aout]",
+                f"{vf_filter}[vout];{audio_filter};[0:a][anew]amix=inputs=2:duration=shortest[aout]",
                 "-map", "[vout]",
                 "-map", "[aout]"
             ])
+        elif self._can_copy_new_audio(audio_path, keep_original_audio, duration):
+            cmd.extend([
+                "-filter_complex", f"{vf_filter}[vout]",
+                "-map", "[vout]",
+                "-map", "1:a:0"
+            ])
+            audio_args = ["-c:a", "copy"]
         else:
             cmd.extend([
-                "-filter_complex", f"{vf_filter}",
-                "-map", "1:a"
+                "-filter_complex", f"{vf_filter}[vout];{audio_filter}",
+                "-map", "[vout]",
+                "-map", "[anew]"
             ])
         
-        cmd.extend([
-            "-c:a", "aac",
-            "-b:a", "192k",
-            "-shortest",
-            output_path
-        ])
+        cmd.extend(self._video_codec_args(self.video_encoder))
+        cmd.extend(audio_args)
+        cmd.extend(self._output_args())
+        cmd.append(output_path)
         
         print("   Rendering with blur effect...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self._run_encode(cmd)
         
         if result.returncode == 0 and os.path.exists(output_path):
             print(f"✅ Video saved: {output_path}")
@@ -421,28 +805,33 @@ class VideoComposer:
         try:
             print("📝 Generating SRT subtitles...")
             
-            with open(translated_json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = _load_json(translated_json_path)
             
             sentences = data[0].get("sentence_info", [])
             Path(output_srt_path).parent.mkdir(parents=True, exist_ok=True)
             
-            with open(output_srt_path, 'w', encoding='utf-8') as f:
-                subtitle_index = 1
+            entries = []
+            subtitle_index = 1
+            
+            for sent in sentences:
+                text = sent.get("text_en", sent.get("text_translated", ""))
+                start = sent.get("start", 0)
+                end = sent.get("end", 0)
                 
-                for sent in sentences:
-                    text = sent.get("text_en", sent.get("text_translated", ""))
-                    start = sent.get("start", 0)
-                    end = sent.get("end", 0)
-                    
-                    if "[FAILED:" in text or not text or not text.strip():
-                        continue
-                    
-                    f.write(f"{subtitle_index}\n")
-                    f.write(f"{self._sec_to_timestamp(start)} --> {self._sec_to_timestamp(end)}\n")
-                    f.write(f"{text.strip()}\n\n")
-                    
-                    subtitle_index += 1
+                if "[FAILED:" in text or not text or not text.strip():
+                    continue
+                
+                entries.append(
+                    f"{subtitle_index}\n"
+                    f"{self._sec_to_timestamp(start)} --> {self._sec_to_timestamp(end)}\n"
+                    f"{text.strip()}\n\n"
+                )
+                
+                subtitle_index += 1
+            
+            # One write for the whole file instead of several per cue
+            with open(output_srt_path, 'w', encoding='utf-8') as f:
+                f.write("".join(entries))
             
             print(f"✅ Subtitle file saved: {output_srt_path} ({subtitle_index-1} entries)")
             return True
@@ -458,22 +847,11 @@ class VideoComposer:
         Convert float seconds to SRT timestamp format
         Format: 00:00:00,000
         """
-        td = timedelta(seconds=seconds)
-        timestamp = str(td)
-        
-        if '.' in timestamp:
-            timestamp = timestamp.replace('.', ',')
-            parts = timestamp.split(',')
-            if len(parts) == 2:
-                ms = parts[1][:3].ljust(3, '0')
-                timestamp = f"{parts[0]},{ms}"
-        else:
-            timestamp = f"{timestamp},000"
-        
-        if timestamp.count(':') == 2:
-            return timestamp.rjust(12, "0")
-        else:
-            return f"00:{timestamp}".rjust(12, "0")
+        ms = max(0, int(round(seconds * 1000)))
+        h, ms = divmod(ms, 3600000)
+        m, ms = divmod(ms, 60000)
+        s, ms = divmod(ms, 1000)
+        return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
     
     def get_video_info(self, video_path):
         """
@@ -481,22 +859,12 @@ class VideoComposer:
         Returns: dict with duration, width, height, fps
         """
         try:
-            duration = self._get_duration(video_path)
-            
-            cmd = [
-                "ffprobe",
-                "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=width,height,r_frame_rate",
-                "-of", "json",
-                video_path
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            data = self._probe(video_path)
             
-            if result.returncode == 0:
-                import json as json_lib
-                data = json_lib.loads(result.stdout)
-                stream = data.get("streams", [{}])[0]
+            if data:
+                duration = self._get_duration(video_path)
+                video_streams = [st for st in data.get("streams", []) if st.get("codec_type") == "video"]
+                stream = video_streams[0] if video_streams else {}
                 
                 width = stream.get("width", 0)
                 height = stream.get("height", 0)